@@ -0,0 +1,115 @@
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIHandler
+from django.db import close_old_connections, connections
+
+# Django 3.2 и DRF 3.12 не умеют асинхронно ходить в ORM, поэтому
+# асинхронные варианты выполняют DRF-представление в пуле потоков,
+# а отдачу ответа клиенту оставляют циклу событий ASGI-сервера.
+ASYNC_URL_NAMES = {
+    'recipes-list',
+    'recipes-detail',
+    'recipes-download-shopping-cart',
+    'ingredients-list',
+}
+
+
+class StreamingASGIHandler(ASGIHandler):
+    """
+    Django 3.2 читает потоковый ответ прямо в цикле событий, где ORM
+    запрещён. Здесь куски тела читаются по одному в отдельном потоке,
+    одном на ответ: курсор базы не переходит между потоками, а память
+    не растёт с размером выгрузки.
+    """
+
+    @staticmethod
+    def get_response_headers(response):
+        headers = [
+            (
+                header.encode('ascii') if isinstance(header, str)
+                else bytes(header),
+                value.encode('latin1') if isinstance(value, str)
+                else bytes(value),
+            )
+            for header, value in response.items()
+        ]
+        headers.extend(
+            (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+            for cookie in response.cookies.values()
+        )
+        return headers
+
+    async def send_response(self, response, send):
+        if not response.streaming:
+            return await super().send_response(response, send)
+        loop = asyncio.get_running_loop()
+        # Контекст запроса (например, привязка к основной базе) нужен
+        # и при чтении тела.
+        context = contextvars.copy_context()
+        executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='asgi-stream'
+        )
+        parts = iter(response)
+
+        def run(func, *args):
+            return loop.run_in_executor(executor, context.run, func, *args)
+
+        try:
+            await send({
+                'type': 'http.response.start',
+                'status': response.status_code,
+                'headers': self.get_response_headers(response),
+            })
+            while True:
+                part = await run(next, parts, None)
+                if part is None:
+                    break
+                for chunk, _ in self.chunk_bytes(part):
+                    await send({
+                        'type': 'http.response.body',
+                        'body': chunk,
+                        'more_body': True,
+                    })
+            await send({'type': 'http.response.body'})
+        finally:
+            # Незавершённый генератор закрывается в своём потоке,
+            # до закрытия соединений этого потока.
+            try:
+                await run(response.close)
+            finally:
+                await run(connections.close_all)
+                executor.shutdown(wait=False)
+
+
+def run_view(view, request, *args, **kwargs):
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        # Соединения потоков пула не закрываются сигналом request_finished.
+        close_old_connections()
+
+
+def as_async_view(view):
+    """Асинхронная обёртка над синхронным представлением."""
+    run = sync_to_async(run_view, thread_sensitive=False)
+
+    @wraps(view)
+    async def async_view(request, *args, **kwargs):
+        return await run(view, request, *args, **kwargs)
+
+    return async_view
+
+
+def use_async_views(urlpatterns, names=ASYNC_URL_NAMES):
+    """Подменяет представления маршрутов с именами из names на асинхронные."""
+    for pattern in urlpatterns:
+        if pattern.name in names:
+            pattern.callback = as_async_view(pattern.callback)
+    return urlpatterns
@@ -0,0 +1,90 @@
+import bisect
+import threading
+import time
+from itertools import islice
+
+from django.conf import settings
+
+from foods.models import Ingredient
+from .caching import get_cache_version
+
+CACHE_NAMESPACE = 'ingredients'
+
+
+def normalize(text):
+    return text.casefold().replace('ё', 'е').strip()
+
+
+class IngredientIndex:
+    """
+    Индекс названий ингредиентов в памяти процесса для автодополнения.
+    Строится при первом поиске и сбрасывается сигналами Ingredient.
+    Изменения из других процессов подхватываются по версии справочника
+    в общем кэше, а с локальным кэшем — не позже, чем через
+    INGREDIENT_INDEX_TTL секунд.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._index = None
+        self._built_at = 0
+        self._version = None
+
+    def invalidate(self):
+        self._index = None
+
+    def _is_fresh(self, index):
+        return (
+            index is not None
+            and time.monotonic() - self._built_at
+            < settings.INGREDIENT_INDEX_TTL
+            and self._version == get_cache_version(CACHE_NAMESPACE)
+        )
+
+    def _get(self):
+        # Индекс читается в локальную переменную: invalidate() из другого
+        # потока может обнулить self._index в любой момент.
+        index = self._index
+        if self._is_fresh(index):
+            return index
+        with self._lock:
+            index = self._index
+            if self._is_fresh(index):
+                return index
+            # Версия читается до данных: сброс во время построения
+            # приведёт к ещё одной перестройке, а не к старому индексу.
+            version = get_cache_version(CACHE_NAMESPACE)
+            items = sorted(
+                Ingredient.objects.values('id', 'name', 'measurement_unit'),
+                key=lambda item: (normalize(item['name']), item['id'])
+            )
+            index = ([normalize(item['name']) for item in items], items)
+            self._built_at = time.monotonic()
+            self._version = version
+            self._index = index
+        return index
+
+    def search(self, query, limit):
+        """
+        Сначала точные совпадения, затем совпадения по началу названия,
+        затем по вхождению подстроки.
+        """
+        keys, items = self._get()
+        query = normalize(query)
+        if not query:
+            return items[:limit]
+        start = bisect.bisect_left(keys, query)
+        end = bisect.bisect_left(keys, query + '\U0010ffff', lo=start)
+        results = items[start:min(end, start + limit)]
+        if len(results) < limit:
+            results.extend(islice(
+                (
+                    item for key, item in zip(keys, items)
+                    if query in key and not key.startswith(query)
+                ),
+                limit - len(results)
+            ))
+        return results
+
+
+ingredient_index = IngredientIndex()
@@ -0,0 +1,101 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+
+def get_cache_version(namespace):
+    """
+    Время последнего изменения данных, оно же версия их кэша.
+    Версия живёт CATALOG_CACHE_TIMEOUT секунд: с локальным кэшем
+    процесс не видит чужих сбросов, и только истечение версии
+    ограничивает, как долго он отдаёт старые данные.
+    """
+    key = f'cache-version:{namespace}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time(), settings.CATALOG_CACHE_TIMEOUT)
+        return cache.get(key, time.time())
+    return version
+
+
+def bump_cache_version(namespace):
+    cache.set(
+        f'cache-version:{namespace}', time.time(),
+        settings.CATALOG_CACHE_TIMEOUT,
+    )
+
+
+def make_etag(*parts):
+    """Слабый ETag из произвольных частей состояния ответа."""
+    digest = hashlib.md5('|'.join(map(str, parts)).encode()).hexdigest()
+    return f'W/{quote_etag(digest)}'
+
+
+def get_not_modified(request, etag, last_modified=None):
+    """
+    Ответ 304, если у клиента уже есть версия с таким ETag. Без общего
+    кэша (CACHE_SHARED) ETag может строиться по устаревшей версии
+    этого процесса, поэтому 304 не отдаётся.
+    """
+    if not settings.CACHE_SHARED:
+        return None
+    response = get_conditional_response(
+        request, etag=etag, last_modified=last_modified
+    )
+    if response is not None:
+        response['ETag'] = etag
+    return response
+
+
+class CatalogCacheMixin:
+    """
+    Кэширует ответ list справочника целиком и отдаёт ETag/Last-Modified.
+    Ключ содержит версию справочника, которую сигналы меняют при любом
+    изменении, поэтому старые записи просто перестают читаться.
+    С локальным кэшем (locmem) другие процессы увидят изменение не позже,
+    чем через CATALOG_CACHE_TIMEOUT секунд, когда истечёт их версия,
+    и 304 не отдаётся.
+    """
+    cache_namespace = None
+
+    def get_catalog_data(self, request, *args, **kwargs):
+        serializer_class = self.get_serializer_class()
+        if self.paginator is not None or not getattr(
+            serializer_class, 'values_mode', False
+        ):
+            return super().list(request, *args, **kwargs).data
+        # Плоскому справочнику хватает словарей .values() вместо моделей.
+        queryset = self.filter_queryset(self.get_queryset()).values(
+            *serializer_class.Meta.fields
+        )
+        return self.get_serializer(queryset, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        version = get_cache_version(self.cache_namespace)
+        query = hashlib.md5(
+            request.META.get('QUERY_STRING', '').encode()
+        ).hexdigest()
+        etag = quote_etag(f'{self.cache_namespace}-{version}-{query}')
+        headers = {
+            'ETag': f'W/{etag}',
+            'Last-Modified': http_date(version),
+        }
+        not_modified = get_not_modified(
+            request, headers['ETag'], last_modified=int(version)
+        )
+        if not_modified is not None:
+            for header, value in headers.items():
+                not_modified[header] = value
+            return not_modified
+
+        key = f'catalog:{self.cache_namespace}:{version}:{query}'
+        data = cache.get(key)
+        if data is None:
+            data = self.get_catalog_data(request, *args, **kwargs)
+            cache.set(key, data, settings.CATALOG_CACHE_TIMEOUT)
+        return Response(data, headers=headers)
@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+import os
+import tempfile
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework import status
+from rest_framework.renderers import BaseRenderer
+
+CHUNK_SIZE = 64 * 1024
+
+
+class ShoppingListExporter(BaseRenderer):
+    """
+    Базовый класс выгрузки списка покупок.
+    Экспортеры являются рендерерами DRF, поэтому формат выбирается
+    стандартным согласованием контента: по ?format= или заголовку Accept.
+    """
+    charset = 'utf-8'
+    title = 'Список продуктов к покупке:'
+
+    @property
+    def content_type(self):
+        if self.charset:
+            return f'{self.media_type}; charset={self.charset}'
+        return self.media_type
+
+    def lines(self, ingredients):
+        raise NotImplementedError
+
+    @staticmethod
+    def format_item(ingredient):
+        if not ingredient['is_numeric']:
+            return f'- {ingredient["name"]} ({ingredient["measurement_unit"]})'
+        return (
+            f'- {ingredient["name"]} '
+            f'- {ingredient["total"]} '
+            f'{ingredient["measurement_unit"]}'
+        )
+
+    def stream(self, ingredients):
+        """Отдаёт файл частями примерно по CHUNK_SIZE байт."""
+        buffer = []
+        size = 0
+        for line in self.lines(ingredients):
+            line = line.encode(self.charset)
+            buffer.append(line)
+            size += len(line)
+            if size >= CHUNK_SIZE:
+                yield b''.join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield b''.join(buffer)
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        response = (renderer_context or {}).get('response')
+        if response is not None and not status.is_success(
+            response.status_code
+        ):
+            # Ошибки ({'detail': ...}) отдаются в JSON. Content-Type
+            # Response уже выставил по экспортеру, поэтому он заменяется.
+            response['Content-Type'] = 'application/json'
+            return json.dumps(data, ensure_ascii=False).encode()
+        return b''.join(self.stream(data))
+
+
+class TextExporter(ShoppingListExporter):
+    media_type = 'text/plain'
+    format = 'txt'
+
+    def lines(self, ingredients):
+        yield f'{self.title}\n'
+        for ingredient in ingredients:
+            yield f'{self.format_item(ingredient)}\n'
+
+
+class CSVExporter(ShoppingListExporter):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def lines(self, ingredients):
+        row = io.StringIO()
+        writer = csv.writer(row)
+        writer.writerow(('name', 'amount', 'measurement_unit'))
+        for ingredient in ingredients:
+            writer.writerow((
+                ingredient['name'],
+                ingredient['total'] if ingredient['is_numeric'] else '',
+                ingredient['measurement_unit'],
+            ))
+            yield row.getvalue()
+            row.seek(0)
+            row.truncate()
+        yield row.getvalue()
+
+
+class JSONExporter(ShoppingListExporter):
+    media_type = 'application/json'
+    format = 'json'
+
+    def lines(self, ingredients):
+        yield '['
+        separator = ''
+        for ingredient in ingredients:
+            yield separator + json.dumps({
+                'name': ingredient['name'],
+                'measurement_unit': ingredient['measurement_unit'],
+                'amount': (
+                    ingredient['total'] if ingredient['is_numeric'] else None
+                ),
+            }, ensure_ascii=False)
+            separator = ','
+        yield ']'
+
+
+class PDFExporter(ShoppingListExporter):
+    """
+    PDF собирается во временный файл, который держится в памяти только
+    до SHOPPING_CART_PDF_SPOOL_SIZE байт, и отдаётся из него частями.
+    """
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    font_name = 'ShoppingListFont'
+    font_size = 12
+    margin = 50
+
+    def get_font(self):
+        font_path = settings.SHOPPING_CART_PDF_FONT
+        if not os.path.exists(font_path):
+            return 'Helvetica'
+        if self.font_name not in pdfmetrics.getRegisteredFontNames():
+            pdfmetrics.registerFont(TTFont(self.font_name, font_path))
+        return self.font_name
+
+    def stream(self, ingredients):
+        font = self.get_font()
+        _, height = A4
+        line_height = self.font_size * 1.5
+        with tempfile.SpooledTemporaryFile(
+            max_size=settings.SHOPPING_CART_PDF_SPOOL_SIZE
+        ) as file:
+            page = canvas.Canvas(file, pagesize=A4)
+            page.setFont(font, self.font_size)
+            y = height - self.margin
+            page.drawString(self.margin, y, self.title)
+            for ingredient in ingredients:
+                y -= line_height
+                if y < self.margin:
+                    page.showPage()
+                    page.setFont(font, self.font_size)
+                    y = height - self.margin
+                page.drawString(self.margin, y, self.format_item(ingredient))
+            page.save()
+            file.seek(0)
+            while True:
+                chunk = file.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                yield chunk
+
+
+SHOPPING_LIST_EXPORTERS = (
+    TextExporter,
+    CSVExporter,
+    JSONExporter,
+    PDFExporter,
+)
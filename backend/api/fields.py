@@ -0,0 +1,62 @@
+from django.conf import settings
+from drf_extra_fields.fields import Base64ImageField
+from rest_framework import serializers
+
+from foods.images import get_variant_name
+
+
+class RecipeImageField(Base64ImageField):
+    """
+    Картинка в base64 с ограничением размера: слишком большой payload
+    отклоняется до декодирования, слишком большое изображение — до
+    полной распаковки пикселей.
+    """
+
+    def to_internal_value(self, base64_data):
+        max_size = settings.RECIPE_IMAGE_MAX_SIZE
+        is_base64 = isinstance(base64_data, str)
+        if is_base64 and len(base64_data) * 3 // 4 > max_size:
+            raise serializers.ValidationError(
+                f'Картинка больше {max_size // (1024 * 1024)} МБ'
+            )
+        image = super().to_internal_value(base64_data)
+        if image is not None:
+            width, height = image.image.size
+            if width * height > settings.RECIPE_IMAGE_MAX_PIXELS:
+                raise serializers.ValidationError(
+                    'Слишком большое разрешение картинки'
+                )
+        return image
+
+
+class RecipeImageURLField(serializers.Field):
+    """
+    URL уменьшенной картинки рецепта для нужного места: preview, list
+    или detail. Без variant он выбирается по действию view. Пока
+    варианты не готовы, отдаётся оригинал.
+    """
+
+    def __init__(self, variant=None, **kwargs):
+        self.variant = variant
+        kwargs['source'] = '*'
+        kwargs['read_only'] = True
+        super().__init__(**kwargs)
+
+    def get_variant(self):
+        if self.variant:
+            return self.variant
+        view = self.context.get('view')
+        return 'list' if getattr(view, 'action', None) == 'list' else 'detail'
+
+    def to_representation(self, recipe):
+        if not recipe.image:
+            return None
+        if recipe.image_hash:
+            url = recipe.image.storage.url(get_variant_name(
+                recipe.image_hash,
+                settings.RECIPE_IMAGE_WIDTHS[self.get_variant()],
+            ))
+        else:
+            url = recipe.image.url
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
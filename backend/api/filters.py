@@ -1,6 +1,23 @@
+from django import forms
+from django.db.models import Exists, F, OuterRef
 from django_filters import rest_framework as filters
 
-from foods.models import Ingredient, Recipe
+from foods.models import Favorite, Ingredient, Recipe, ShoppingCart
+from foods.search import search_recipes
+
+
+class MultipleValueField(forms.MultipleChoiceField):
+    """
+    Несколько значений параметра без проверки по списку вариантов,
+    чтобы не запрашивать варианты из базы на каждый запрос.
+    """
+
+    def valid_value(self, value):
+        return True
+
+
+class MultipleValueFilter(filters.Filter):
+    field_class = MultipleValueField
 
 
 class IngredientFilter(filters.FilterSet):
@@ -17,9 +34,18 @@ class IngredientFilter(filters.FilterSet):
         fields = ('name',)
 
 
+RECIPE_ORDERINGS = {
+    'popular': (F('favorites_count').desc(), '-pub_date', '-id'),
+    'trending': ('-trending_score', '-pub_date', '-id'),
+    'cooking_time': ('cooking_time', '-pub_date', '-id'),
+}
+
+
 class RecipeFilter(filters.FilterSet):
     """
     Фильтр для рецептов.
+    Все условия собираются в один запрос через EXISTS, без JOIN,
+    поэтому рецепты в выдаче не дублируются.
     """
     is_favorited = filters.BooleanFilter(
         field_name='is_favorited',
@@ -29,14 +55,43 @@ class RecipeFilter(filters.FilterSet):
         field_name='is_in_shopping_cart',
         method='shopping_cart_filter'
     )
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = MultipleValueFilter(method='tags_filter')
+    author = filters.NumberFilter(field_name='author')
+    search = filters.CharFilter(method='search_filter')
+    ordering = filters.ChoiceFilter(
+        choices=[(ordering, ordering) for ordering in RECIPE_ORDERINGS],
+        method='ordering_filter',
+    )
+
+    def user_filter(self, queryset, model, value):
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset.none() if value else queryset
+        exists = Exists(model.objects.filter(
+            user=user, recipe=OuterRef('pk')
+        ))
+        return queryset.filter(exists if value else ~exists)
 
     def favorite_filter(self, queryset, name, value):
-        return Recipe.objects.filter(favorite__user=self.request.user)
+        return self.user_filter(queryset, Favorite, value)
 
     def shopping_cart_filter(self, queryset, name, value):
-        return Recipe.objects.filter(shopping_cart__user=self.request.user)
+        return self.user_filter(queryset, ShoppingCart, value)
+
+    def tags_filter(self, queryset, name, value):
+        return queryset.filter(Exists(Recipe.tags.through.objects.filter(
+            recipe=OuterRef('pk'), tag__slug__in=value
+        )))
+
+    def search_filter(self, queryset, name, value):
+        return search_recipes(queryset, value)
+
+    def ordering_filter(self, queryset, name, value):
+        return queryset.order_by(*RECIPE_ORDERINGS[value])
 
     class Meta:
         model = Recipe
-        fields = ['author']
+        fields = (
+            'is_favorited', 'is_in_shopping_cart', 'tags', 'author',
+            'search', 'ordering',
+        )
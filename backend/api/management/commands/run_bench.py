@@ -0,0 +1,182 @@
+import json
+import math
+import statistics
+import time
+import tracemalloc
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from rest_framework.test import APIClient
+
+from api.autocomplete import ingredient_index
+from api.caching import bump_cache_version
+from api.profiling import QueryProfile
+from foods.models import Ingredient, Recipe, Tag
+from users.models import User
+
+
+class RollbackError(Exception):
+    pass
+
+
+def percentile(values, percent):
+    """Перцентиль методом ближайшего ранга."""
+    values = sorted(values)
+    rank = max(math.ceil(percent / 100 * len(values)), 1)
+    return values[rank - 1]
+
+
+class Command(BaseCommand):
+    help = 'Benchmarks key API endpoints in-process and saves JSON report'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=30)
+        parser.add_argument('--warmup', type=int, default=3)
+        parser.add_argument(
+            '--user',
+            default='bench_user_0',
+            help='Пользователь, от имени которого идут запросы',
+        )
+        parser.add_argument('--label', default='', help='Метка прогона')
+        parser.add_argument('--output', help='Файл для JSON-отчёта')
+
+    def get_scenarios(self, user):
+        tag = Tag.objects.first()
+        ingredients = list(Ingredient.objects.values_list('id', flat=True)[:5])
+        recipe_data = {
+            'name': 'Тестовый рецепт',
+            'text': 'Описание',
+            'cooking_time': 10,
+            'image': (
+                'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAY'
+                'AAAAfFcSJAAAADUlEQVR42mNk+M9QDwADhgGAWjR9awAAAABJRU5ErkJggg=='
+            ),
+            'tags': [tag.id] if tag else [],
+            'ingredients': [
+                {'id': ingredient_id, 'amount': 100}
+                for ingredient_id in ingredients
+            ],
+        }
+        recipes = '/api/recipes/'
+        return {
+            'recipes-list': ('get', recipes, None),
+            'recipes-list-cursor': ('get', f'{recipes}?cursor=', None),
+            'recipes-list-favorited': (
+                'get', f'{recipes}?is_favorited=1', None,
+            ),
+            'recipes-list-in-cart': (
+                'get', f'{recipes}?is_in_shopping_cart=1', None,
+            ),
+            'recipes-list-tags': (
+                'get', f'{recipes}?tags={tag.slug if tag else ""}', None,
+            ),
+            'recipes-list-author': (
+                'get', f'{recipes}?author={user.id}', None,
+            ),
+            'recipes-list-popular': (
+                'get', f'{recipes}?ordering=popular', None,
+            ),
+            'recipes-list-trending': (
+                'get', f'{recipes}?ordering=trending', None,
+            ),
+            'recipes-list-search': ('get', f'{recipes}?search=суп', None),
+            'users-subscriptions': (
+                'get', '/api/users/subscriptions/?recipes_limit=3', None,
+            ),
+            'download-shopping-cart': (
+                'get', f'{recipes}download_shopping_cart/', None,
+            ),
+            'ingredients-search': ('get', '/api/ingredients/?name=ка', None),
+            'recipes-create': ('post', recipes, recipe_data),
+        }
+
+    @staticmethod
+    def request(client, method, url, data):
+        """
+        Выполняет запрос целиком, включая потоковое тело ответа.
+        Запросы на запись откатываются, чтобы прогоны были повторяемы.
+        """
+        try:
+            with transaction.atomic():
+                response = getattr(client, method)(url, data, format='json')
+                if response.streaming:
+                    for _ in response.streaming_content:
+                        pass
+                if method != 'get':
+                    raise RollbackError
+        except RollbackError:
+            pass
+        return response
+
+    def measure(self, client, method, url, data, iterations, warmup):
+        for _ in range(warmup):
+            self.request(client, method, url, data)
+        timings = []
+        for _ in range(iterations):
+            started = time.perf_counter()
+            response = self.request(client, method, url, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        with QueryProfile().activate() as profile:
+            self.request(client, method, url, data)
+        # Память меряется отдельным прогоном: tracemalloc замедляет код.
+        tracemalloc.start()
+        self.request(client, method, url, data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'status': response.status_code,
+            'p50_ms': round(statistics.median(timings), 2),
+            'p95_ms': round(percentile(timings, 95), 2),
+            'mean_ms': round(statistics.mean(timings), 2),
+            'queries': profile.queries,
+            'duplicate_queries': sum(
+                count - 1 for count in profile.duplicates.values()
+            ),
+            'peak_memory_kb': round(peak / 1024, 1),
+        }
+
+    def handle(self, *args, **options):
+        if options['iterations'] < 2:
+            raise CommandError('--iterations должен быть не меньше 2')
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(
+                f'Пользователь {options["user"]} не найден, '
+                'сначала запустите seed_bench'
+            )
+        # seed_bench пишет через bulk_create, минуя сигналы сброса кэшей.
+        ingredient_index.invalidate()
+        for namespace in ('tags', 'ingredients'):
+            bump_cache_version(namespace)
+
+        client = APIClient()
+        client.force_authenticate(user)
+        results = {}
+        for name, (method, url, data) in self.get_scenarios(user).items():
+            results[name] = self.measure(
+                client, method, url, data,
+                options['iterations'], options['warmup'],
+            )
+            self.stdout.write(
+                f'{name}: p50 {results[name]["p50_ms"]} мс, '
+                f'p95 {results[name]["p95_ms"]} мс, '
+                f'запросов {results[name]["queries"]}'
+            )
+
+        report = json.dumps({
+            'label': options['label'],
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'database': connection.vendor,
+            'recipes': Recipe.objects.count(),
+            'users': User.objects.count(),
+            'iterations': options['iterations'],
+            'results': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report)
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчёт сохранён в {options["output"]}'
+            ))
+        else:
+            self.stdout.write(report)
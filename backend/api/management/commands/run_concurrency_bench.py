@@ -0,0 +1,153 @@
+import asyncio
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.management import CommandError
+from django.db import connection, connections
+from django.test import AsyncClient, Client
+from rest_framework.authtoken.models import Token
+
+from users.models import User
+from .run_bench import Command as BenchCommand, percentile
+
+
+def read_streaming(response):
+    """Читает тело потокового ответа и закрывает соединения потока."""
+    try:
+        for _ in response.streaming_content:
+            pass
+    finally:
+        connections.close_all()
+
+
+class Command(BenchCommand):
+    help = (
+        'Compares throughput of read endpoints under WSGI and ASGI handlers '
+        'at several concurrency levels'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Запросов на сценарий и уровень')
+        parser.add_argument('--concurrency', type=int, nargs='+',
+                            default=[1, 8, 32])
+        parser.add_argument('--handler', choices=('wsgi', 'asgi'),
+                            nargs='+', default=['wsgi', 'asgi'])
+        parser.add_argument('--user', default='bench_user_0')
+        parser.add_argument('--label', default='')
+        parser.add_argument('--output')
+
+    def run_wsgi(self, url, token, requests, concurrency):
+        local = threading.local()
+
+        def send():
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_AUTHORIZATION=f'Token {token}')
+            started = time.perf_counter()
+            try:
+                response = local.client.get(url)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                return response.status_code, time.perf_counter() - started
+            finally:
+                connections.close_all()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            return list(executor.map(lambda _: send(), range(requests)))
+
+    def run_asgi(self, url, token, requests, concurrency):
+        async def main():
+            client = AsyncClient()
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def send():
+                async with semaphore:
+                    started = time.perf_counter()
+                    response = await client.get(
+                        url, authorization=f'Token {token}'
+                    )
+                    if response.streaming:
+                        # Как StreamingASGIHandler: тело читается в потоке.
+                        await sync_to_async(
+                            read_streaming, thread_sensitive=False
+                        )(response)
+                    return (
+                        response.status_code,
+                        time.perf_counter() - started,
+                    )
+
+            return await asyncio.gather(*(send() for _ in range(requests)))
+
+        return asyncio.run(main())
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['user']).first()
+        if user is None:
+            raise CommandError(
+                f'Пользователь {options["user"]} не найден, '
+                'сначала запустите seed_bench'
+            )
+        token, _ = Token.objects.get_or_create(user=user)
+        scenarios = {
+            name: url
+            for name, (method, url, _) in self.get_scenarios(user).items()
+            if method == 'get'
+        }
+        results = []
+        for handler in options['handler']:
+            run = getattr(self, f'run_{handler}')
+            for concurrency in options['concurrency']:
+                for name, url in scenarios.items():
+                    started = time.perf_counter()
+                    try:
+                        responses = run(
+                            url, token.key, options['requests'], concurrency,
+                        )
+                    except Exception as error:
+                        results.append({
+                            'handler': handler,
+                            'concurrency': concurrency,
+                            'scenario': name,
+                            'error': repr(error),
+                        })
+                        continue
+                    elapsed = time.perf_counter() - started
+                    timings = [duration * 1000 for _, duration in responses]
+                    result = {
+                        'handler': handler,
+                        'concurrency': concurrency,
+                        'scenario': name,
+                        'rps': round(len(responses) / elapsed, 1),
+                        'p50_ms': round(statistics.median(timings), 2),
+                        'p95_ms': round(percentile(timings, 95), 2),
+                        'errors': sum(
+                            status >= 400 for status, _ in responses
+                        ),
+                    }
+                    results.append(result)
+                    self.stdout.write(
+                        f'{handler} x{concurrency} {name}: '
+                        f'{result["rps"]} rps, p95 {result["p95_ms"]} мс'
+                    )
+
+        report = json.dumps({
+            'label': options['label'],
+            'created': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+            'database': connection.vendor,
+            'async_api_views': settings.ASYNC_API_VIEWS,
+            'requests': options['requests'],
+            'results': results,
+        }, ensure_ascii=False, indent=2)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                file.write(report)
+            self.stdout.write(self.style.SUCCESS(
+                f'Отчёт сохранён в {options["output"]}'
+            ))
+        else:
+            self.stdout.write(report)
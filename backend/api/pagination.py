@@ -1,6 +1,123 @@
-from rest_framework.pagination import PageNumberPagination
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination,
+)
+from rest_framework.response import Response
 
 
 class LimitPageNumberPagination(PageNumberPagination):
     page_size = 6
     page_size_query_param = 'limit'
+
+
+def get_approximate_count(queryset):
+    """
+    Оценка числа строк по плану запроса Postgres без COUNT(*).
+    На других СУБД считает точно.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+        plan = cursor.fetchone()[0]
+    return plan[0]['Plan']['Plan Rows']
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Пагинация по ключу (pub_date, id) для ленты рецептов.
+    Страница выбирается условием на позицию соседнего рецепта, а не
+    OFFSET, поэтому любая страница стоит как первая. Общее число рецептов
+    (оценочное) отдаётся только по запросу ?with_count=1.
+    """
+    ordering = ('-pub_date', '-id')
+    page_size = 6
+    page_size_query_param = 'limit'
+    max_page_size = 100
+    count_query_param = 'with_count'
+
+    @property
+    def position_fields(self):
+        return [field.lstrip('-') for field in self.ordering]
+
+    def encode_position(self, item):
+        date_field, pk_field = self.position_fields
+        return (
+            f'{getattr(item, date_field).isoformat()}|'
+            f'{getattr(item, pk_field)}'
+        )
+
+    def decode_position(self, position):
+        pub_date, _, pk = position.partition('|')
+        pub_date = parse_datetime(pub_date)
+        if pub_date is None or not pk.isdigit():
+            raise NotFound(self.invalid_cursor_message)
+        return pub_date, int(pk)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        self.count = None
+        if request.query_params.get(self.count_query_param):
+            self.count = get_approximate_count(queryset)
+
+        reverse = self.cursor is not None and self.cursor.reverse
+        date_field, pk_field = self.position_fields
+        if self.cursor is not None and self.cursor.position:
+            pub_date, pk = self.decode_position(self.cursor.position)
+            lookup = 'gt' if reverse else 'lt'
+            queryset = queryset.filter(
+                Q(**{f'{date_field}__{lookup}': pub_date})
+                | Q(**{date_field: pub_date, f'{pk_field}__{lookup}': pk})
+            )
+        ordering = self.position_fields if reverse else self.ordering
+        results = list(queryset.order_by(*ordering)[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = bool(self.cursor and self.cursor.position)
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False,
+            position=self.encode_position(self.page[-1]),
+        ))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=True,
+            position=self.encode_position(self.page[0]),
+        ))
+
+    def get_paginated_response(self, data):
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_link()
+        response['previous'] = self.get_previous_link()
+        response['results'] = data
+        return Response(response)
+
+
+class FeedPagination(KeysetPagination):
+    """Та же пагинация по ключу для записей ленты подписок."""
+    ordering = ('-pub_date', '-recipe_id')
@@ -0,0 +1,199 @@
+import asyncio
+import json
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+current_profile = ContextVar('current_profile', default=None)
+serializer_depth = ContextVar('serializer_depth', default=0)
+
+FINGERPRINT_RULES = (
+    (re.compile(r"'(?:[^']|'')*'"), '?'),
+    (re.compile(r'\b\d+(?:\.\d+)?\b'), '?'),
+    (re.compile(r'\(\s*\?(?:\s*,\s*\?)*\s*\)'), '(...)'),
+)
+
+
+class QueryBudgetExceededError(Exception):
+    pass
+
+
+def get_fingerprint(sql):
+    """SQL без конкретных значений: одинаковые запросы дают один отпечаток."""
+    for pattern, replacement in FINGERPRINT_RULES:
+        sql = pattern.sub(replacement, sql)
+    return sql
+
+
+def profile_queries(execute, sql, params, many, context):
+    """
+    execute_wrapper всех соединений: считает запрос в профиль текущего
+    контекста. Контекст переходит в потоки sync_to_async, поэтому
+    под ASGI учитываются запросы из любого потока.
+    """
+    profile = current_profile.get()
+    if profile is None:
+        return execute(sql, params, many, context)
+    return profile(execute, sql, params, many, context)
+
+
+def install_profiler(connection, **kwargs):
+    if profile_queries not in connection.execute_wrappers:
+        connection.execute_wrappers.append(profile_queries)
+
+
+class QueryProfile:
+    """
+    Считает запросы, время SQL и время сериализации
+    в блоке activate() текущего контекста.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.sql_time = 0
+        self.serializer_time = 0
+        self.fingerprints = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.sql_time += time.perf_counter() - started
+            self.queries += 1
+            self.fingerprints[get_fingerprint(sql)] += 1
+
+    @property
+    def duplicates(self):
+        return {
+            sql: count for sql, count in self.fingerprints.items()
+            if count > 1
+        }
+
+    @contextmanager
+    def activate(self):
+        # Соединения, открытые до запуска приложений, не получили сигнал.
+        for connection in connections.all():
+            install_profiler(connection)
+        token = current_profile.set(self)
+        try:
+            yield self
+        finally:
+            current_profile.reset(token)
+
+
+class ProfiledSerializerMixin:
+    """
+    Добавляет время to_representation к профилю запроса.
+    Вложенные сериализаторы отдельно не считаются.
+    """
+
+    def to_representation(self, instance):
+        profile = current_profile.get()
+        depth = serializer_depth.get()
+        if profile is None or depth:
+            return super().to_representation(instance)
+        token = serializer_depth.set(depth + 1)
+        started = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            profile.serializer_time += time.perf_counter() - started
+            serializer_depth.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries):
+    """
+    Для тестов: падает, если внутри блока запросов больше max_queries,
+    и показывает повторяющиеся запросы.
+    """
+    with QueryProfile().activate() as profile:
+        yield profile
+    if profile.queries > max_queries:
+        raise AssertionError(
+            f'{profile.queries} запросов при бюджете {max_queries}. '
+            f'Повторы: {json.dumps(profile.duplicates, ensure_ascii=False)}'
+        )
+
+
+class QueryBudgetMiddleware:
+    """
+    Профилирует долю запросов QUERY_PROFILING_SAMPLE_RATE: отдаёт
+    Server-Timing, пишет строку лога в JSON и, если включён
+    QUERY_BUDGET_ENFORCE, падает при превышении QUERY_BUDGETS для
+    имени URL. Без выборки и проверки бюджета ничего не делает.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django 3.2 узнаёт асинхронный middleware.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def is_profiled(self):
+        sample_rate = settings.QUERY_PROFILING_SAMPLE_RATE
+        return settings.QUERY_BUDGET_ENFORCE or (
+            sample_rate and random.random() < sample_rate
+        )
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not self.is_profiled():
+            return self.get_response(request)
+        started = time.perf_counter()
+        with QueryProfile().activate() as profile:
+            response = self.get_response(request)
+        return self.report(request, response, profile, started)
+
+    async def __acall__(self, request):
+        if not self.is_profiled():
+            return await self.get_response(request)
+        started = time.perf_counter()
+        with QueryProfile().activate() as profile:
+            response = await self.get_response(request)
+        return self.report(request, response, profile, started)
+
+    def report(self, request, response, profile, started):
+        total_time = time.perf_counter() - started
+        enforce = settings.QUERY_BUDGET_ENFORCE
+        match = request.resolver_match
+        url_name = match.url_name if match else None
+        budget = settings.QUERY_BUDGETS.get(url_name)
+        response['Server-Timing'] = (
+            f'db;dur={profile.sql_time * 1000:.1f};'
+            f'desc="{profile.queries} queries", '
+            f'serializer;dur={profile.serializer_time * 1000:.1f}, '
+            f'total;dur={total_time * 1000:.1f}'
+        )
+        logger.info(json.dumps({
+            'url_name': url_name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': profile.queries,
+            'sql_ms': round(profile.sql_time * 1000, 1),
+            'serializer_ms': round(profile.serializer_time * 1000, 1),
+            'total_ms': round(total_time * 1000, 1),
+            'budget': budget,
+            'duplicates': profile.duplicates,
+        }, ensure_ascii=False))
+        if enforce and budget is not None and profile.queries > budget:
+            raise QueryBudgetExceededError(
+                f'{url_name}: {profile.queries} запросов '
+                f'при бюджете {budget}'
+            )
+        return response
@@ -0,0 +1,90 @@
+import math
+import re
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson пишет 1e16, а json — 1e+16. Выражение начинается с литерала,
+# так поиск в разы быстрее; совпадение внутри строки лишь включает
+# обычный рендеринг.
+EXPONENT = re.compile(rb'e-?[0-9]')
+
+
+def has_exponent(rendered):
+    return any(
+        rendered[match.start() - 1:match.start()].isdigit()
+        for match in EXPONENT.finditer(rendered)
+    )
+
+
+def has_non_finite(data, rendered):
+    """
+    Есть ли в данных NaN или бесконечность: orjson пишет их как null.
+    Если все null в ответе объясняются None верхнего уровня (например,
+    next/previous пагинации), данные не обходятся.
+    """
+    nulls = rendered.count(b'null')
+    if not nulls:
+        return False
+    if isinstance(data, dict) and nulls == sum(
+        value is None for value in data.values()
+    ):
+        return False
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, float):
+            if not math.isfinite(value):
+                return True
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+    return False
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSONRenderer на orjson. Вывод совпадает с DRF побайтно: компактные
+    разделители, UTF-8 без экранирования, экранированные U+2028/U+2029,
+    даты через кодировщик DRF. Без orjson, при запросе отступов, для
+    чисел с экспонентой и NaN/бесконечностей работает обычный
+    JSONRenderer.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        renderer_context = renderer_context or {}
+        if orjson is None or self.ensure_ascii or not self.compact or (
+            self.get_indent(accepted_media_type or '', renderer_context)
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        try:
+            ret = orjson.dumps(
+                data,
+                default=self.encoder_class().default,
+                option=(
+                    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+                ),
+            )
+        except TypeError:
+            # Например, int больше 64 бит: отдаём стандартному кодировщику.
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        if has_exponent(ret) or has_non_finite(data, ret):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(
+                b'\xe2\x80\xa9', b'\\u2029'
+            )
+        return ret
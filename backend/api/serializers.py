@@ -1,16 +1,25 @@
-from django.shortcuts import get_object_or_404
+from collections import Counter, OrderedDict
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.functional import cached_property
 from djoser.serializers import UserCreateSerializer, UserSerializer
-from drf_extra_fields.fields import Base64ImageField
 from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
 
 from rest_framework.validators import UniqueTogetherValidator
+
+from .fields import RecipeImageField, RecipeImageURLField
+from .profiling import ProfiledSerializerMixin
 from users.models import User, Follow
+from foods.cart_totals import change_recipe, skip_recipe
+from foods.images import schedule_image_processing
 from foods.models import (
     Ingredient,
     Tag,
     AmountIngredient,
     Recipe,
-    ShoppingCart
 )
 
 
@@ -25,7 +34,7 @@ class CreateUserSerializer(UserCreateSerializer):
         extra_kwargs = {'password': {'write_only': True}}
 
 
-class UserListSerializer(UserSerializer):
+class UserListSerializer(ProfiledSerializerMixin, UserSerializer):
     """Сериализатор для управления пользователями."""
     is_subscribed = serializers.SerializerMethodField()
 
@@ -41,13 +50,70 @@ class UserListSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
         user = self.context['request'].user
         return Follow.objects.filter(
             user=user, author=obj
         ).exists() if user.is_authenticated else False
 
 
-class TagSerializer(serializers.ModelSerializer):
+class ValuesSerializerMixin:
+    """
+    Быстрое чтение для плоских сериализаторов: простые поля берутся
+    из объекта или словаря .values() напрямую, без get_attribute и
+    to_representation полей DRF. Результат совпадает с обычным.
+    """
+    values_mode = True
+    simple_field_types = (
+        serializers.IntegerField,
+        serializers.CharField,
+        serializers.SlugField,
+        serializers.ReadOnlyField,
+    )
+
+    @cached_property
+    def values_plan(self):
+        plan = []
+        for field in self._readable_fields:
+            simple = (
+                type(field) in self.simple_field_types
+                and len(field.source_attrs) == 1
+            )
+            plan.append((
+                field.field_name,
+                field.source_attrs[0] if simple else None,
+                field,
+            ))
+        return plan
+
+    def to_representation(self, instance):
+        ret = OrderedDict()
+        is_values = isinstance(instance, dict)
+        for name, attr, field in self.values_plan:
+            if attr is not None:
+                ret[name] = instance[attr] if is_values else getattr(
+                    instance, attr
+                )
+                continue
+            try:
+                attribute = field.get_attribute(instance)
+            except SkipField:
+                continue
+            check_for_none = (
+                attribute.pk if isinstance(attribute, PKOnlyObject)
+                else attribute
+            )
+            ret[name] = None if check_for_none is None else (
+                field.to_representation(attribute)
+            )
+        return ret
+
+
+class TagSerializer(
+    ProfiledSerializerMixin, ValuesSerializerMixin,
+    serializers.ModelSerializer,
+):
     """Сериализатор для управления тегами"""
 
     class Meta:
@@ -57,7 +123,10 @@ class TagSerializer(serializers.ModelSerializer):
         )
 
 
-class IngredientSerializer(serializers.ModelSerializer):
+class IngredientSerializer(
+    ProfiledSerializerMixin, ValuesSerializerMixin,
+    serializers.ModelSerializer,
+):
     """Сериализатор для управления ингридиентами"""
 
     class Meta:
@@ -94,10 +163,13 @@ class IngredientRecipeReadSerializer(serializers.ModelSerializer):
         )
 
 
-class RecipeSerializer(serializers.ModelSerializer):
-    """Сериализатор для рецептов."""
-    is_favorited = serializers.SerializerMethodField()
-    is_in_shopping_cart = serializers.SerializerMethodField()
+class RecipeSerializer(ProfiledSerializerMixin, serializers.ModelSerializer):
+    """
+    Сериализатор для рецептов.
+    Флаги пользователя берутся из аннотаций RecipeQuerySet.with_user_flags.
+    """
+    is_favorited = serializers.BooleanField(read_only=True)
+    is_in_shopping_cart = serializers.BooleanField(read_only=True)
     author = UserListSerializer(read_only=True)
     tags = TagSerializer(many=True)
     ingredients = IngredientRecipeReadSerializer(
@@ -105,6 +177,7 @@ class RecipeSerializer(serializers.ModelSerializer):
         source='amount_ingredient',
         read_only=True
     )
+    image = RecipeImageURLField()
 
     class Meta:
         model = Recipe
@@ -113,25 +186,16 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_in_shopping_cart', 'name', 'image', 'text', 'cooking_time',
         )
 
-    def get_is_favorited(self, obj):
-        request = self.context.get('request')
-        if request.user.is_anonymous:
-            return False
-        return request.user.favorite.filter(recipe=obj).exists()
-
-    def get_is_in_shopping_cart(self, obj):
-        user = self.context.get('request').user
-        return ShoppingCart.objects.filter(
-            user=user, recipe=obj
-        ).exists() if user.is_authenticated else False
+    def to_representation(self, recipe):
+        if hasattr(recipe, 'author_is_subscribed') and recipe.author:
+            recipe.author.is_subscribed = recipe.author_is_subscribed
+        return super().to_representation(recipe)
 
 
 class RecipeCreateSerializer(serializers.ModelSerializer):
     ingredients = IngredientCreateSerializer(many=True)
-    tags = serializers.PrimaryKeyRelatedField(
-        queryset=Tag.objects.all(), many=True
-    )
-    image = Base64ImageField(use_url=True, )
+    tags = serializers.ListField(child=serializers.IntegerField())
+    image = RecipeImageField(use_url=True, )
     cooking_time = serializers.IntegerField()
 
     class Meta:
@@ -154,40 +218,48 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
             )
         return cooking_time
 
-    def check_ingredients(self, data):
-        validated_items = []
-        existed = []
-        for item in data:
-            ingredient = get_object_or_404(Ingredient, pk=item['id'])
-            if ingredient in validated_items:
-                existed.append(ingredient)
-            validated_items.append(ingredient)
-        if existed:
+    @staticmethod
+    def get_in_bulk(model, ids, message):
+        """Все объекты по id одним запросом; 400 со списком ненайденных."""
+        objects = model.objects.in_bulk(ids)
+        missing = sorted(set(ids) - objects.keys())
+        if missing:
             raise serializers.ValidationError(
-                'Этот ингредиент уже добавлен'
+                f'{message}: {", ".join(map(str, missing))}'
             )
+        return objects
 
-    def validate(self, data):
-        ingredients = data.get('ingredients')
-        self.check_ingredients(ingredients)
-        data['ingredients'] = ingredients
-        return data
+    def validate_tags(self, tags):
+        return list(self.get_in_bulk(
+            Tag, tags, 'Тегов с такими id не существует'
+        ).values())
+
+    def validate_ingredients(self, ingredients):
+        ids = [item['id'] for item in ingredients]
+        existed = sorted(pk for pk, count in Counter(ids).items() if count > 1)
+        if existed:
+            raise serializers.ValidationError(
+                f'Этот ингредиент уже добавлен: {", ".join(map(str, existed))}'
+            )
+        objects = self.get_in_bulk(
+            Ingredient, ids, 'Ингредиентов с такими id не существует'
+        )
+        for item in ingredients:
+            item['ingredient'] = objects[item['id']]
+        return ingredients
 
     @staticmethod
     def create_ingredients(ingredients, recipe):
-        ingredient_list = []
-        for ingredient in ingredients:
-            amount = ingredient['amount']
-            recipe_ingredient = AmountIngredient(
-                ingredients=get_object_or_404(
-                    Ingredient, id=ingredient['id']
-                ),
+        AmountIngredient.objects.bulk_create(
+            AmountIngredient(
+                ingredients=ingredient['ingredient'],
                 recipe=recipe,
-                amount=amount
+                amount=ingredient['amount']
             )
-            ingredient_list.append(recipe_ingredient)
-        AmountIngredient.objects.bulk_create(ingredient_list)
+            for ingredient in ingredients
+        )
 
+    @transaction.atomic
     def create(self, validated_data):
         tags_data = validated_data.pop('tags')
         ingredients_data = validated_data.pop('ingredients')
@@ -195,26 +267,71 @@ class RecipeCreateSerializer(serializers.ModelSerializer):
         recipe = Recipe.objects.create(image=image, **validated_data)
         self.create_ingredients(ingredients_data, recipe)
         recipe.tags.set(tags_data)
+        schedule_image_processing(recipe)
         return recipe
 
+    def update_ingredients(self, ingredients, recipe):
+        """
+        Меняет только отличающиеся строки AmountIngredient:
+        удаляет лишние, обновляет количество и добавляет новые.
+        """
+        current = {
+            item.ingredients_id: item
+            for item in recipe.amount_ingredient.all()
+        }
+        incoming = {item['id']: item for item in ingredients}
+        removed = current.keys() - incoming.keys()
+        deltas = {pk: -current[pk].amount for pk in removed}
+        if removed:
+            # Сигналы удаления не трогают итоги: их меняет change_recipe.
+            with skip_recipe(recipe.pk):
+                AmountIngredient.objects.filter(
+                    recipe=recipe, ingredients_id__in=removed
+                ).delete()
+        changed = []
+        for pk, item in incoming.items():
+            if pk in current and current[pk].amount != item['amount']:
+                deltas[pk] = item['amount'] - current[pk].amount
+                current[pk].amount = item['amount']
+                changed.append(current[pk])
+        if changed:
+            AmountIngredient.objects.bulk_update(changed, ('amount',))
+        added = [item for pk, item in incoming.items() if pk not in current]
+        if added:
+            self.create_ingredients(added, recipe)
+            deltas.update((item['id'], item['amount']) for item in added)
+        # bulk-операции не вызывают сигналы: итоги корзин меняются здесь.
+        change_recipe(recipe.pk, deltas)
+
+    @transaction.atomic
     def update(self, recipe, validated_data):
-        ingredients = validated_data.pop('ingredients')
-        tags = validated_data.pop('tags')
-        AmountIngredient.objects.filter(recipe=recipe).delete()
-        self.create_ingredients(ingredients, recipe)
-        recipe.tags.set(tags)
+        ingredients = validated_data.pop('ingredients', None)
+        tags = validated_data.pop('tags', None)
+        if ingredients is not None:
+            self.update_ingredients(ingredients, recipe)
+        if tags is not None:
+            recipe.tags.set(tags)
+        if 'image' in validated_data:
+            recipe.image_hash = ''
+            schedule_image_processing(recipe)
         return super().update(recipe, validated_data)
 
     def to_representation(self, recipe):
+        request = self.context.get('request')
+        recipe = Recipe.objects.with_related().with_user_flags(
+            request.user
+        ).get(pk=recipe.pk)
         return RecipeSerializer(
             recipe,
-            context={'request': self.context.get('request')}
+            context={'request': request}
         ).data
 
 
-class RecipeSubcribeSerializer(serializers.ModelSerializer):
+class RecipeSubcribeSerializer(
+    ValuesSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор для отображения рецепта в подписке."""
-    image = Base64ImageField()
+    image = RecipeImageURLField(variant='preview')
 
     class Meta:
         model = Recipe
@@ -226,7 +343,9 @@ class RecipeSubcribeSerializer(serializers.ModelSerializer):
         )
 
 
-class SubscribeSerializer(serializers.ModelSerializer):
+class SubscribeSerializer(
+    ProfiledSerializerMixin, serializers.ModelSerializer
+):
     """Сериализатор для подписок."""
     recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField(read_only=True)
@@ -256,16 +375,24 @@ class SubscribeSerializer(serializers.ModelSerializer):
         ]
 
     def get_recipes(self, obj):
-        request = self.context.get('request')
-        recipes_limit = request.GET.get('recipes_limit')
-        recipes = Recipe.objects.filter(author=obj.author)
-        if recipes_limit:
-            recipes = recipes[:int(recipes_limit)]
-        serializer = RecipeSubcribeSerializer(recipes, many=True)
-        return serializer.data
+        return RecipeSubcribeSerializer(
+            obj.author.recipes.all(), many=True
+        ).data
 
     def get_recipes_count(self, obj):
-        return Recipe.objects.filter(author=obj.author).count()
+        return obj.author.recipes_count
 
     def get_is_subscribed(self, obj):
-        return Follow.objects.filter(user=obj.user, author=obj.author).exists()
+        return obj.user_id == self.context['request'].user.id
+
+
+class BatchIdsSerializer(serializers.Serializer):
+    """Список id для пакетных операций, без повторов."""
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=settings.BATCH_MAX_IDS,
+    )
+
+    def validate_ids(self, ids):
+        return list(dict.fromkeys(ids))
@@ -1,31 +1,89 @@
-from django.db.models import Sum
-from django.http import HttpResponse
+from django.db import transaction
+from django.db.models import F, Sum, Value
+from django.db.models.functions import Coalesce
+from django.http import StreamingHttpResponse
 
-from foods.models import AmountIngredient
+from foods.models import ShoppingCartItemTotal
+from foods.signals import bulk_created
+from users.models import User
 from django.conf import settings
 
 
-def get_ingredients_for_shopping(user):
-    ingredients = AmountIngredient.objects.filter(
-        recipe__shopping_cart__user=user
-    ).values(
-        'ingredients__name',
-        'ingredients__measurement_unit',
+def get_shopping_list(user):
+    """
+    Читает готовые итоги ShoppingCartItemTotal пользователя.
+    Количества переводятся в каноническую единицу прямо в запросе,
+    поэтому кг и г одного ингредиента дают одну строку. Единицы без
+    записи в таблице единиц суммируются как есть, несуммируемые
+    («по вкусу») идут отдельно в конце списка.
+    """
+    return ShoppingCartItemTotal.objects.filter(user=user).values(
+        name=F('ingredient__name'),
+        measurement_unit=Coalesce(
+            'ingredient__unit__base_unit', 'ingredient__measurement_unit'
+        ),
+        is_numeric=Coalesce('ingredient__unit__is_numeric', Value(True)),
     ).annotate(
-        value=Sum('amount')
-    ).order_by('ingredients__name')
-    response = HttpResponse(
-        content_type='text/plain',
-        charset='utf-8',
+        total=Sum(
+            F('amount') * Coalesce('ingredient__unit__factor', Value(1))
+        )
+    ).order_by('-is_numeric', 'name', 'measurement_unit')
+
+
+def get_ingredients_for_shopping(user, exporter):
+    ingredients = get_shopping_list(user).iterator(
+        chunk_size=settings.SHOPPING_CART_CHUNK_SIZE
+    )
+    response = StreamingHttpResponse(
+        exporter.stream(ingredients),
+        content_type=exporter.content_type,
     )
     response['Content-Disposition'] = (
-        f'attachment; filename={settings.SHOPPING_CART_FILENAME}'
+        'attachment; '
+        f'filename={settings.SHOPPING_CART_FILENAME}.{exporter.format}'
     )
-    response.write('Список продуктов к покупке:\n')
-    for ingredient in ingredients:
-        response.write(
-            f'- {ingredient["ingredients__name"]} '
-            f'- {ingredient["value"]} '
-            f'{ingredient["ingredients__measurement_unit"]}\n'
-        )
     return response
+
+
+@transaction.atomic
+def add_batch(user, model, field, targets, ids):
+    """
+    Создаёт записи model (избранное, корзина, подписки) для всех
+    существующих объектов targets с id из ids одним bulk_create.
+    Возвращает статус для каждого id: created, exists или not_found.
+    """
+    # Пакеты одного пользователя выполняются по очереди.
+    User.objects.select_for_update().filter(pk=user.pk).exists()
+    found = set(targets.filter(pk__in=ids).values_list('pk', flat=True))
+    existing = set(model.objects.filter(
+        user=user, **{f'{field}_id__in': found}
+    ).values_list(f'{field}_id', flat=True))
+    created = found - existing
+    model.objects.bulk_create(
+        [model(user=user, **{f'{field}_id': pk}) for pk in created],
+        ignore_conflicts=True,
+    )
+    if created:
+        bulk_created.send(
+            sender=model, user_id=user.pk, target_ids=list(created)
+        )
+    return {
+        pk: 'created' if pk in created
+        else 'exists' if pk in existing
+        else 'not_found'
+        for pk in ids
+    }
+
+
+@transaction.atomic
+def remove_batch(user, model, field, ids):
+    """
+    Удаляет записи model пользователя для id из ids одним DELETE.
+    Возвращает статус для каждого id: deleted или absent.
+    """
+    queryset = model.objects.filter(user=user, **{f'{field}_id__in': ids})
+    existing = set(queryset.values_list(f'{field}_id', flat=True))
+    queryset.delete()
+    return {
+        pk: 'deleted' if pk in existing else 'absent' for pk in ids
+    }
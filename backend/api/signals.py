@@ -0,0 +1,102 @@
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from foods.models import (
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tag,
+    TrendingCheckpoint,
+)
+from foods.signals import bulk_created, ingredients_loaded
+from users.models import Follow, User
+
+from .authentication import get_token_cache_key
+from .autocomplete import ingredient_index
+from .caching import bump_cache_version
+from .profiling import install_profiler
+
+
+def get_user_flags_namespace(user_id):
+    return f'user-flags:{user_id}'
+
+
+def bump_user_flags(model, user_id):
+    bump_cache_version(get_user_flags_namespace(user_id))
+    if model is Favorite:
+        bump_cache_version('recipe-ordering:popular')
+
+
+@receiver(ingredients_loaded)
+def invalidate_ingredients(**kwargs):
+    ingredient_index.invalidate()
+    bump_cache_version('ingredients')
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+def invalidate_ingredient_index(instance, **kwargs):
+    invalidate_ingredients()
+    Recipe.objects.filter(
+        amount_ingredient__ingredients=instance
+    ).update(updated_at=timezone.now())
+
+
+@receiver((post_save, post_delete), sender=Tag)
+def invalidate_tags(instance, **kwargs):
+    bump_cache_version('tags')
+    Recipe.objects.filter(tags=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_save, sender=User)
+def touch_author_recipes(instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    Recipe.objects.filter(author=instance).update(updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=Token)
+def invalidate_cached_token(instance, **kwargs):
+    cache.delete(get_token_cache_key(instance.key))
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user_tokens(instance, update_fields=None, **kwargs):
+    """В кэше токена лежит копия пользователя: она должна быть свежей."""
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    cache.delete_many([
+        get_token_cache_key(key)
+        for key in Token.objects.filter(user=instance).values_list(
+            'key', flat=True
+        )
+    ])
+
+
+@receiver((post_save, post_delete), sender=Favorite)
+@receiver((post_save, post_delete), sender=ShoppingCart)
+@receiver((post_save, post_delete), sender=Follow)
+def invalidate_user_flags(sender, instance, **kwargs):
+    bump_user_flags(sender, instance.user_id)
+
+
+@receiver(bulk_created)
+def invalidate_bulk_user_flags(sender, user_id, **kwargs):
+    bump_user_flags(sender, user_id)
+
+
+@receiver(post_save, sender=TrendingCheckpoint)
+def invalidate_trending(**kwargs):
+    transaction.on_commit(
+        lambda: bump_cache_version('recipe-ordering:trending')
+    )
+
+
+@receiver(connection_created)
+def install_query_profiler(connection, **kwargs):
+    install_profiler(connection)
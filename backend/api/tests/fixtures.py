@@ -0,0 +1,72 @@
+from django.core.cache import cache
+from rest_framework.test import APITestCase
+
+from foods.models import AmountIngredient, Ingredient, Recipe, Tag
+from users.models import User
+
+
+def create_user(username):
+    return User.objects.create_user(
+        username=username,
+        email=f'{username}@example.com',
+        password='password',
+        first_name=username,
+        last_name=username,
+    )
+
+
+def create_recipe(author, name, tags=(), ingredients=()):
+    """Рецепт без файла картинки; ingredients — пары (ингредиент, amount)."""
+    recipe = Recipe.objects.create(
+        author=author,
+        name=name,
+        text='Описание',
+        cooking_time=10,
+        image='media/test.png',
+    )
+    recipe.tags.set(tags)
+    AmountIngredient.objects.bulk_create(
+        AmountIngredient(recipe=recipe, ingredients=ingredient, amount=amount)
+        for ingredient, amount in ingredients
+    )
+    return recipe
+
+
+class RecipeAPITestCase(APITestCase):
+    """Три тега, три автора и по рецепту на каждого автора и тег."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tags = [
+            Tag.objects.create(
+                name=f'Тег {index}',
+                color=f'#00000{index}',
+                slug=f'tag-{index}',
+            )
+            for index in range(3)
+        ]
+        cls.ingredients = [
+            Ingredient.objects.create(
+                name=f'Ингредиент {index}', measurement_unit='г'
+            )
+            for index in range(6)
+        ]
+        cls.authors = [create_user(f'author-{index}') for index in range(3)]
+        cls.user = create_user('reader')
+        cls.recipes = [
+            create_recipe(
+                author,
+                f'Рецепт {author.username} {tag.slug}',
+                tags=[tag],
+                ingredients=[
+                    (cls.ingredients[index], 100 + index),
+                    (cls.ingredients[index + 3], 10),
+                ],
+            )
+            for author in cls.authors
+            for index, tag in enumerate(cls.tags)
+        ]
+
+    def setUp(self):
+        # Версии кэша и ETag не должны переходить между тестами.
+        cache.clear()
@@ -0,0 +1,92 @@
+import asyncio
+import json
+import time
+
+from asgiref.sync import async_to_sync
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import AsyncClient, SimpleTestCase, override_settings
+from django.urls import path
+
+from api.async_views import StreamingASGIHandler, as_async_view
+from users.models import User
+
+
+def slow_view(request):
+    time.sleep(0.2)
+    return HttpResponse('ok')
+
+
+def streaming_view(request):
+    def rows():
+        for number in range(3):
+            # ORM в цикле событий запрещён: тело читается в потоке.
+            yield f'{number}:{User.objects.exists()}\n'
+    return StreamingHttpResponse(rows())
+
+
+urlpatterns = [
+    path('slow/', as_async_view(slow_view)),
+    path('stream/', as_async_view(streaming_view)),
+]
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncViewTest(SimpleTestCase):
+    databases = {'default'}
+
+    def test_middleware_does_not_serialize_requests(self):
+        """Middleware проекта не сводят запросы в один поток."""
+        client = AsyncClient()
+
+        async def main():
+            return await asyncio.gather(
+                *(client.get('/slow/') for _ in range(8))
+            )
+
+        started = time.perf_counter()
+        responses = async_to_sync(main)()
+        elapsed = time.perf_counter() - started
+        self.assertTrue(all(r.status_code == 200 for r in responses))
+        self.assertLess(elapsed, 8 * 0.2 / 2)
+
+    def test_streaming_body_is_sent_in_parts(self):
+        messages = []
+
+        async def receive():
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+        async def send(message):
+            messages.append(message)
+
+        scope = {
+            'type': 'http',
+            'method': 'GET',
+            'path': '/stream/',
+            'query_string': b'',
+            'headers': [],
+        }
+        async_to_sync(StreamingASGIHandler())(scope, receive, send)
+        self.assertEqual(messages[0]['type'], 'http.response.start')
+        self.assertEqual(messages[0]['status'], 200)
+        bodies = [
+            message['body'] for message in messages[1:-1]
+        ]
+        self.assertEqual(
+            bodies, [b'0:False\n', b'1:False\n', b'2:False\n']
+        )
+        self.assertEqual(messages[-1], {'type': 'http.response.body'})
+
+    @override_settings(
+        ROOT_URLCONF='foodgram.urls', QUERY_PROFILING_SAMPLE_RATE=1
+    )
+    def test_profiling_counts_queries_from_threads(self):
+        async def get():
+            return await AsyncClient().get('/api/recipes/')
+
+        # assertLogs заодно не пускает строку профиля в вывод тестов.
+        with self.assertLogs('api.profiling', 'INFO') as logs:
+            response = async_to_sync(get)()
+        self.assertEqual(response.status_code, 200)
+        self.assertRegex(response['Server-Timing'], r'"[1-9]\d* queries"')
+        record = json.loads(logs.records[0].getMessage())
+        self.assertGreater(record['queries'], 0)
@@ -0,0 +1,50 @@
+from foods.models import Favorite
+from users.models import Follow
+
+from .fixtures import RecipeAPITestCase
+
+
+class BatchTest(RecipeAPITestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.client.force_authenticate(self.user)
+
+    def get_statuses(self, url, ids, method='post'):
+        response = getattr(self.client, method)(
+            url, {'ids': ids}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return {
+            item['id']: item['status'] for item in response.json()['results']
+        }
+
+    def test_subscribe(self):
+        author = self.authors[0].pk
+        statuses = self.get_statuses(
+            '/api/users/subscribe/', [author, self.user.pk, 999999]
+        )
+        self.assertEqual(statuses, {
+            author: 'created', self.user.pk: 'not_found', 999999: 'not_found',
+        })
+        self.assertFalse(
+            Follow.objects.filter(user=self.user, author=self.user).exists()
+        )
+        self.assertEqual(
+            self.get_statuses('/api/users/subscribe/', [author]),
+            {author: 'exists'},
+        )
+
+    def test_favorite(self):
+        ids = [self.recipes[0].pk, self.recipes[1].pk]
+        self.assertEqual(
+            self.get_statuses('/api/recipes/favorite/', ids),
+            dict.fromkeys(ids, 'created'),
+        )
+        self.assertEqual(
+            Favorite.objects.filter(user=self.user).count(), 2
+        )
+        self.assertEqual(
+            self.get_statuses('/api/recipes/favorite/', ids, 'delete'),
+            dict.fromkeys(ids, 'deleted'),
+        )
@@ -0,0 +1,69 @@
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APITestCase
+
+from api.autocomplete import ingredient_index
+from api.caching import bump_cache_version, get_cache_version
+from foods.models import Ingredient
+
+
+class CacheVersionTest(SimpleTestCase):
+
+    def setUp(self):
+        cache.clear()
+
+    def test_bump_changes_version(self):
+        version = get_cache_version('tags')
+        self.assertEqual(get_cache_version('tags'), version)
+        bump_cache_version('tags')
+        self.assertNotEqual(get_cache_version('tags'), version)
+
+    @override_settings(CATALOG_CACHE_TIMEOUT=0)
+    def test_version_expires(self):
+        """Без общего кэша устаревшая версия не живёт дольше таймаута."""
+        bump_cache_version('tags')
+        self.assertIsNone(cache.get('cache-version:tags'))
+        get_cache_version('tags')
+        self.assertIsNone(cache.get('cache-version:tags'))
+
+
+class IngredientImportTest(APITestCase):
+    """csv_manager сбрасывает справочник и индекс автодополнения."""
+
+    def setUp(self):
+        cache.clear()
+        ingredient_index.invalidate()
+        Ingredient.objects.create(name='Мука', measurement_unit='г')
+
+    def get_names(self, **params):
+        response = self.client.get('/api/ingredients/', params)
+        return [item['name'] for item in response.json()]
+
+    def test_import_invalidates_caches(self):
+        self.assertEqual(self.get_names(), ['Мука'])
+        self.assertEqual(self.get_names(name='мо'), [])
+        with tempfile.NamedTemporaryFile(
+            'w', suffix='.csv', encoding='utf-8'
+        ) as file:
+            file.write('Молоко,мл\n')
+            file.flush()
+            with self.captureOnCommitCallbacks(execute=True):
+                call_command('csv_manager', path=file.name, stdout=StringIO())
+        self.assertEqual(self.get_names(), ['Молоко', 'Мука'])
+        self.assertEqual(self.get_names(name='мо'), ['Молоко'])
+
+    def test_other_process_bump_rebuilds_index(self):
+        """Сброс версии в общем кэше виден индексу без invalidate()."""
+        self.assertEqual(ingredient_index.search('мо', 10), [])
+        Ingredient.objects.bulk_create([
+            Ingredient(name='Молоко', measurement_unit='мл'),
+        ])
+        bump_cache_version('ingredients')
+        self.assertEqual(
+            [item['name'] for item in ingredient_index.search('мо', 10)],
+            ['Молоко'],
+        )
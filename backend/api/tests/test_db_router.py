@@ -0,0 +1,158 @@
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    OperationalError,
+    connections,
+    transaction,
+)
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from foodgram import db_router
+from foods.images import process_recipe_image
+from foods.models import Ingredient, Recipe, ShoppingCart
+
+from .fixtures import create_recipe, create_user
+
+REPLICAS = ['replica_a', 'replica_b']
+
+# Реплики — зеркала тестовой базы: данные общие, а по соединению видно,
+# куда ушёл запрос. Алиасы добавляются до создания тестовых баз.
+for alias in REPLICAS:
+    replica = {
+        **settings.DATABASES[DEFAULT_DB_ALIAS],
+        'TEST': {'MIRROR': DEFAULT_DB_ALIAS},
+    }
+    settings.DATABASES.setdefault(alias, replica)
+    connections.databases.setdefault(alias, replica)
+
+
+@override_settings(REPLICA_DATABASES=REPLICAS)
+class ReplicaRouterTest(TransactionTestCase):
+    databases = {DEFAULT_DB_ALIAS, *REPLICAS}
+
+    def setUp(self):
+        cache.clear()
+        db_router.unavailable.clear()
+        self.addCleanup(db_router.unavailable.clear)
+        self.user = create_user('reader')
+        self.token = Token.objects.create(user=self.user)
+        self.recipe = create_recipe(
+            create_user('author'),
+            'Рецепт',
+            ingredients=[(
+                Ingredient.objects.create(
+                    name='Ингредиент', measurement_unit='г'
+                ),
+                100,
+            )],
+        )
+
+    def get_client(self):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {self.token.key}')
+        return client
+
+    def request(self, method, path, client=None, **kwargs):
+        """Выполняет запрос и возвращает ответ и алиасы баз с запросами."""
+        client = client or self.get_client()
+        captured = {
+            alias: CaptureQueriesContext(connections[alias])
+            for alias in self.databases
+        }
+        for context in captured.values():
+            context.__enter__()
+        try:
+            response = getattr(client, method)(path, **kwargs)
+            if response.streaming:
+                b''.join(response.streaming_content)
+        finally:
+            for context in captured.values():
+                context.__exit__(None, None, None)
+        return response, {
+            alias for alias, context in captured.items()
+            if len(context)
+        }
+
+    def assert_replicas_only(self, aliases):
+        self.assertTrue(aliases)
+        self.assertLessEqual(aliases, set(REPLICAS))
+
+    def test_reads_go_to_replica(self):
+        with mock.patch('random.shuffle'):
+            self.assertEqual(Recipe.objects.all().db, REPLICAS[0])
+        response, aliases = self.request('get', '/api/recipes/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assert_replicas_only(aliases)
+
+    def test_writes_and_transactions_use_primary(self):
+        self.assertEqual(
+            db_router.ReplicaRouter().db_for_write(Recipe), DEFAULT_DB_ALIAS
+        )
+        with transaction.atomic():
+            self.assertEqual(Recipe.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_unavailable_replica_is_skipped(self):
+        replica = connections[REPLICAS[0]]
+        # Без перемешивания первой всегда проверяется недоступная реплика.
+        with mock.patch('random.shuffle'), mock.patch.object(
+            replica, 'ensure_connection', side_effect=OperationalError
+        ) as ensure_connection:
+            for _ in range(3):
+                self.assertEqual(Recipe.objects.all().db, REPLICAS[1])
+        ensure_connection.assert_called_once()
+        with mock.patch(
+            'django.db.backends.base.base.BaseDatabaseWrapper'
+            '.ensure_connection',
+            side_effect=OperationalError,
+        ):
+            db_router.unavailable.clear()
+            self.assertEqual(Recipe.objects.all().db, DEFAULT_DB_ALIAS)
+
+    def test_write_pins_client_to_primary(self):
+        client = self.get_client()
+        response, aliases = self.request(
+            'post', f'/api/recipes/{self.recipe.pk}/shopping_cart/',
+            client=client,
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(aliases, {DEFAULT_DB_ALIAS})
+        self.assertIn(db_router.PIN_COOKIE, response.cookies)
+        # По cookie: клиент сразу видит свою запись.
+        response, aliases = self.request(
+            'get', '/api/recipes/', client=client,
+            data={'is_in_shopping_cart': 1},
+        )
+        self.assertEqual(len(response.json()['results']), 1)
+        self.assertEqual(aliases, {DEFAULT_DB_ALIAS})
+        # По заголовку Authorization, без cookie.
+        response, aliases = self.request('get', '/api/recipes/')
+        self.assertEqual(aliases, {DEFAULT_DB_ALIAS})
+        cache.clear()
+        response, aliases = self.request('get', '/api/recipes/')
+        self.assert_replicas_only(aliases)
+
+    def test_streamed_download_reads_primary_when_pinned(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipe)
+        path = '/api/recipes/download_shopping_cart/'
+        response, aliases = self.request('get', path)
+        self.assertEqual(response.status_code, 200)
+        self.assert_replicas_only(aliases)
+        client = self.get_client()
+        client.cookies[db_router.PIN_COOKIE] = '1'
+        response, aliases = self.request('get', path, client=client)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(aliases, {DEFAULT_DB_ALIAS})
+
+    def test_image_processing_reads_primary(self):
+        # Как в потоке пула: ни закрепления, ни транзакции.
+        Recipe.objects.filter(pk=self.recipe.pk).update(image='')
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary:
+            process_recipe_image(self.recipe.pk)
+        self.assertEqual(len(primary), 1)
@@ -0,0 +1,31 @@
+from foods.models import ShoppingCart
+
+from .fixtures import RecipeAPITestCase
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+class ShoppingListExportTest(RecipeAPITestCase):
+
+    def test_formats(self):
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipes[0])
+        self.client.force_authenticate(self.user)
+        for export_format, content_type in (
+            ('txt', 'text/plain; charset=utf-8'),
+            ('csv', 'text/csv; charset=utf-8'),
+            ('json', 'application/json; charset=utf-8'),
+            ('pdf', 'application/pdf'),
+        ):
+            with self.subTest(format=export_format):
+                response = self.client.get(URL, {'format': export_format})
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response['Content-Type'], content_type)
+                self.assertTrue(b''.join(response.streaming_content))
+
+    def test_errors_are_json(self):
+        for export_format in ('txt', 'csv', 'json', 'pdf'):
+            with self.subTest(format=export_format):
+                response = self.client.get(URL, {'format': export_format})
+                self.assertEqual(response.status_code, 401)
+                self.assertEqual(response['Content-Type'], 'application/json')
+                self.assertIn('detail', response.json())
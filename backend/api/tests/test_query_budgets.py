@@ -0,0 +1,38 @@
+from django.conf import settings
+
+from api.profiling import query_budget
+from users.models import Follow
+
+from .fixtures import RecipeAPITestCase
+
+
+class QueryBudgetTest(RecipeAPITestCase):
+    """Горячие эндпоинты укладываются в QUERY_BUDGETS из настроек."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        for author in cls.authors:
+            Follow.objects.create(user=cls.user, author=author)
+
+    def get_cases(self):
+        return {
+            'recipes-list': '/api/recipes/?limit=50',
+            'recipes-detail': f'/api/recipes/{self.recipes[0].pk}/',
+            'users-subscriptions': '/api/users/subscriptions/',
+            'users-list': '/api/users/',
+            'users-me': '/api/users/me/',
+            'tags-list': '/api/tags/',
+            'ingredients-list': '/api/ingredients/?name=инг',
+        }
+
+    def test_budgets(self):
+        self.client.force_authenticate(self.user)
+        for url_name, url in self.get_cases().items():
+            with self.subTest(url_name=url_name):
+                with query_budget(settings.QUERY_BUDGETS[url_name]):
+                    response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.wsgi_request.resolver_match.url_name, url_name
+                )
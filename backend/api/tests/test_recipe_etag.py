@@ -0,0 +1,77 @@
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from foods.models import Recipe
+
+from .fixtures import RecipeAPITestCase
+
+
+@override_settings(CACHE_SHARED=True)
+class RecipeETagTest(RecipeAPITestCase):
+
+    def test_detail_not_modified(self):
+        url = f'/api/recipes/{self.recipes[0].pk}/'
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Recipe.objects.filter(pk=self.recipes[0].pk).update(
+            updated_at=timezone.now()
+        )
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200
+        )
+
+    @override_settings(CACHE_SHARED=False)
+    def test_no_not_modified_without_shared_cache(self):
+        """Версия флагов в локальном кэше может отставать от других."""
+        for url in (f'/api/recipes/{self.recipes[0].pk}/', '/api/recipes/',
+                    '/api/tags/'):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertIn('ETag', response)
+                response = self.client.get(
+                    url, HTTP_IF_NONE_MATCH=response['ETag']
+                )
+                self.assertEqual(response.status_code, 200)
+
+    def test_detail_invalid_pk(self):
+        for pk in ('abc', '0', '999999'):
+            with self.subTest(pk=pk):
+                response = self.client.get(f'/api/recipes/{pk}/')
+                self.assertEqual(response.status_code, 404)
+
+    def test_keyset_page_without_aggregate(self):
+        """Страница по ключу не считает COUNT(*) по всей выборке."""
+        first = self.client.get('/api/recipes/', {'cursor': '', 'limit': 3})
+        next_url = first.json()['next']
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(next_url)
+        self.assertEqual(response.status_code, 200)
+        # Рецепты, теги, ингредиенты.
+        self.assertEqual(len(context.captured_queries), 3)
+        for query in context.captured_queries:
+            self.assertNotIn('COUNT(', query['sql'])
+        etag = response['ETag']
+        self.assertEqual(
+            self.client.get(next_url, HTTP_IF_NONE_MATCH=etag).status_code,
+            304,
+        )
+        # Новый рецепт в начале ленты не меняет следующую страницу.
+        Recipe.objects.create(
+            author=self.authors[0], name='Новый', text='Описание',
+            cooking_time=1, image='media/test.png',
+        )
+        self.assertEqual(
+            self.client.get(next_url, HTTP_IF_NONE_MATCH=etag).status_code,
+            304,
+        )
+        page_ids = [item['id'] for item in response.json()['results']]
+        Recipe.objects.filter(pk=page_ids[0]).update(
+            updated_at=timezone.now()
+        )
+        self.assertEqual(
+            self.client.get(next_url, HTTP_IF_NONE_MATCH=etag).status_code,
+            200,
+        )
@@ -0,0 +1,103 @@
+from io import StringIO
+
+from django.core.management import call_command
+
+from foods.models import Favorite, ShoppingCart
+
+from .fixtures import RecipeAPITestCase
+
+
+class RecipeFilterTest(RecipeAPITestCase):
+    """
+    Каждая комбинация фильтров — один запрос рецептов с EXISTS,
+    без дублей и без запроса вариантов тегов.
+    """
+    # ETag, COUNT(*), рецепты, теги, ингредиенты.
+    QUERIES = 5
+    # Пустой результат: ETag и COUNT(*), сами рецепты не читаются.
+    EMPTY_QUERIES = 2
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        recipes = cls.recipes
+        # Рецепт с двумя тегами не должен дублироваться в выдаче.
+        recipes[0].tags.add(cls.tags[1])
+        for recipe in (recipes[0], recipes[4], recipes[8]):
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+        for recipe in (recipes[0], recipes[1], recipes[5]):
+            ShoppingCart.objects.create(user=cls.user, recipe=recipe)
+
+    def get_ids(self, *indexes):
+        """id рецептов в порядке выдачи: новые первыми."""
+        return sorted(
+            (self.recipes[index].pk for index in indexes), reverse=True
+        )
+
+    def assert_filter(self, params, indexes, user=None, queries=None):
+        self.client.force_authenticate(user)
+        if queries is None:
+            queries = self.QUERIES if indexes else self.EMPTY_QUERIES
+        with self.assertNumQueries(queries):
+            response = self.client.get(
+                '/api/recipes/', {'limit': 50, **params}
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            self.get_ids(*indexes),
+        )
+
+    def test_authenticated(self):
+        author = self.authors[1].pk
+        cases = [
+            ({'is_favorited': 1}, (0, 4, 8)),
+            ({'is_favorited': 0}, (1, 2, 3, 5, 6, 7)),
+            ({'is_in_shopping_cart': 1}, (0, 1, 5)),
+            ({'is_favorited': 1, 'is_in_shopping_cart': 1}, (0,)),
+            ({'tags': ['tag-0', 'tag-1']}, (0, 1, 3, 4, 6, 7)),
+            ({'tags': 'tag-2', 'is_favorited': 1}, (8,)),
+            ({'author': author}, (3, 4, 5)),
+            ({'author': author, 'is_in_shopping_cart': 1}, (5,)),
+            (
+                {
+                    'author': author,
+                    'tags': ['tag-1', 'tag-2'],
+                    'is_favorited': 1,
+                    'is_in_shopping_cart': 0,
+                },
+                (4,),
+            ),
+            ({'tags': 'unknown'}, ()),
+        ]
+        for params, indexes in cases:
+            with self.subTest(**params):
+                self.assert_filter(params, indexes, self.user)
+
+    def test_anonymous(self):
+        # Анонимный is_favorited=1 даёт queryset.none() без запросов.
+        for params in ({'is_favorited': 1}, {'is_in_shopping_cart': 1}):
+            with self.subTest(**params):
+                self.assert_filter(params, (), queries=0)
+        cases = [
+            ({'is_favorited': 0}, range(9)),
+            ({'tags': ['tag-0', 'tag-1']}, (0, 1, 3, 4, 6, 7)),
+            ({'author': self.authors[2].pk}, (6, 7, 8)),
+        ]
+        for params, indexes in cases:
+            with self.subTest(**params):
+                self.assert_filter(params, indexes)
+
+    def test_trending_ordering(self):
+        # Избранное весит 1, корзина 0.5: 0 — 1.5, 4 и 8 — 1, 1 и 5 — 0.5.
+        call_command('refresh_trending', stdout=StringIO())
+        self.client.force_authenticate(self.user)
+        with self.assertNumQueries(self.QUERIES):
+            response = self.client.get(
+                '/api/recipes/', {'limit': 50, 'ordering': 'trending'}
+            )
+        self.assertEqual(
+            [item['id'] for item in response.json()['results']],
+            self.get_ids(0) + self.get_ids(4, 8) + self.get_ids(1, 5)
+            + self.get_ids(2, 3, 6, 7),
+        )
@@ -0,0 +1,66 @@
+from foods.models import Favorite, ShoppingCart
+from users.models import Follow
+
+from .fixtures import RecipeAPITestCase
+
+
+class RecipeQueryCountTest(RecipeAPITestCase):
+    """Число запросов списка и рецепта не зависит от размера страницы."""
+    # ETag, COUNT(*), рецепты с авторами и флагами, теги, ингредиенты.
+    LIST_QUERIES = 5
+    # updated_at для ETag, рецепт с автором и флагами, теги, ингредиенты.
+    DETAIL_QUERIES = 4
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        Favorite.objects.create(user=cls.user, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipes[1])
+        Follow.objects.create(user=cls.user, author=cls.authors[0])
+
+    def get_users(self):
+        return {'anonymous': None, 'authenticated': self.user}
+
+    def test_list(self):
+        for name, user in self.get_users().items():
+            for limit in (6, 50):
+                with self.subTest(user=name, limit=limit):
+                    self.client.force_authenticate(user)
+                    with self.assertNumQueries(self.LIST_QUERIES):
+                        response = self.client.get(
+                            '/api/recipes/', {'limit': limit}
+                        )
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(
+                        len(response.json()['results']),
+                        min(limit, len(self.recipes)),
+                    )
+
+    def test_detail(self):
+        for name, user in self.get_users().items():
+            for recipe in (self.recipes[0], self.recipes[-1]):
+                with self.subTest(user=name, recipe=recipe.pk):
+                    self.client.force_authenticate(user)
+                    with self.assertNumQueries(self.DETAIL_QUERIES):
+                        response = self.client.get(
+                            f'/api/recipes/{recipe.pk}/'
+                        )
+                    self.assertEqual(response.status_code, 200)
+                    self.assertEqual(len(response.json()['ingredients']), 2)
+
+    def test_user_flags(self):
+        self.client.force_authenticate(self.user)
+        results = {
+            item['id']: item
+            for item in self.client.get(
+                '/api/recipes/', {'limit': 50}
+            ).json()['results']
+        }
+        first, second = self.recipes[0].pk, self.recipes[1].pk
+        self.assertTrue(results[first]['is_favorited'])
+        self.assertFalse(results[second]['is_favorited'])
+        self.assertTrue(results[second]['is_in_shopping_cart'])
+        self.assertTrue(results[first]['author']['is_subscribed'])
+        self.assertFalse(
+            results[self.recipes[-1].pk]['author']['is_subscribed']
+        )
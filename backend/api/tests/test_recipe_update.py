@@ -0,0 +1,45 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .fixtures import RecipeAPITestCase
+
+
+class RecipeUpdateTest(RecipeAPITestCase):
+
+    def get_amount_queries(self, queries, statement):
+        return [
+            query['sql'] for query in queries
+            if query['sql'].startswith(statement)
+            and 'foods_amountingredient' in query['sql'].split('WHERE')[0]
+        ]
+
+    def test_change_one_amount_updates_one_row(self):
+        recipe = self.recipes[0]
+        self.client.force_authenticate(recipe.author)
+        ingredients = [
+            {'id': item.ingredients_id, 'amount': item.amount}
+            for item in recipe.amount_ingredient.all()
+        ]
+        ingredients[0]['amount'] += 5
+        ids = set(recipe.amount_ingredient.values_list('id', flat=True))
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.patch(
+                f'/api/recipes/{recipe.pk}/',
+                {'ingredients': ingredients},
+                format='json',
+            )
+        self.assertEqual(response.status_code, 200)
+        queries = context.captured_queries
+        updates = self.get_amount_queries(queries, 'UPDATE')
+        self.assertEqual(len(updates), 1)
+        self.assertIn('UPDATE "foods_amountingredient"', updates[0])
+        changed = recipe.amount_ingredient.get(
+            ingredients_id=ingredients[0]['id']
+        )
+        self.assertTrue(updates[0].endswith(f'IN ({changed.pk})'))
+        self.assertEqual(self.get_amount_queries(queries, 'DELETE'), [])
+        self.assertEqual(self.get_amount_queries(queries, 'INSERT'), [])
+        self.assertEqual(
+            set(recipe.amount_ingredient.values_list('id', flat=True)), ids
+        )
+        self.assertEqual(changed.amount, ingredients[0]['amount'])
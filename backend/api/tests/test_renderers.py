@@ -0,0 +1,108 @@
+import io
+import datetime
+import decimal
+import uuid
+from collections import OrderedDict
+
+from django.test import SimpleTestCase
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer
+from .fixtures import RecipeAPITestCase
+
+
+class FastJSONRendererTest(SimpleTestCase):
+    """Вывод FastJSONRenderer побайтно совпадает с JSONRenderer DRF."""
+
+    def assert_identical(self, data):
+        self.assertEqual(
+            FastJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_identical(self):
+        moment = datetime.datetime(2022, 9, 26, 22, 45, 1, 123456)
+        cases = {
+            'scalars': [1, -2, 0, True, False, None, '', 'строка'],
+            'unicode': {'text': 'Борщ 🍲 "кавычки" \\ \n\t\x00'},
+            'separators': {'text': 'a b c'},
+            'nested': {'a': [{'b': [1, {'c': None}]}], 'd': {}},
+            'non_str_keys': {1: 'a', 2: 'b'},
+            'floats': [0.1, -0.0, 1.5, 123.456, 1e16, 1e-7, 1.5e300],
+            'big_int': [2 ** 63, 2 ** 64, -2 ** 70],
+            'aware_datetime': timezone.make_aware(
+                moment, datetime.timezone.utc
+            ),
+            'other_timezone': timezone.make_aware(
+                moment, datetime.timezone(datetime.timedelta(hours=3))
+            ),
+            'naive_datetime': moment,
+            'date': datetime.date(2022, 9, 26),
+            'time': datetime.time(22, 45, 1, 123),
+            'timedelta': datetime.timedelta(days=1, seconds=5),
+            'decimal': decimal.Decimal('1.50'),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'lazy': gettext_lazy('Ленивый текст'),
+            'ordered': OrderedDict([('b', 1), ('a', 2)]),
+            'return_types': ReturnDict(
+                {'results': ReturnList([1, 2], serializer=None)},
+                serializer=None,
+            ),
+            'tuple': (1, 'a'),
+            'pagination_nulls': {
+                'count': 0, 'next': None, 'previous': None, 'results': [],
+            },
+        }
+        for name, data in cases.items():
+            with self.subTest(name):
+                self.assert_identical(data)
+
+    def test_non_finite_floats(self):
+        for value in (float('nan'), float('inf'), -float('inf')):
+            for data in (value, [value], {'next': None, 'value': value}):
+                with self.subTest(data=data):
+                    with self.assertRaises(ValueError):
+                        JSONRenderer().render(data)
+                    with self.assertRaises(ValueError):
+                        FastJSONRenderer().render(data)
+
+    def test_indent_and_empty(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+        self.assertEqual(
+            FastJSONRenderer().render(
+                {'a': [1]}, 'application/json; indent=2'
+            ),
+            JSONRenderer().render({'a': [1]}, 'application/json; indent=2'),
+        )
+
+
+class FastJSONResponseTest(RecipeAPITestCase):
+    """Реальные ответы API кодируются так же, как в DRF."""
+
+    def test_api_responses(self):
+        urls = [
+            '/api/recipes/?limit=50',
+            f'/api/recipes/{self.recipes[0].pk}/',
+            '/api/tags/',
+            '/api/ingredients/',
+            '/api/users/',
+        ]
+        for url in urls:
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(
+                    response.content,
+                    JSONRenderer().render(response.data),
+                )
+
+    def test_parser(self):
+        body = JSONRenderer().render({'name': 'Борщ', 'ids': [1, 2]})
+        stream = io.BytesIO(body)
+        self.assertEqual(
+            FastJSONParser().parse(stream),
+            {'name': 'Борщ', 'ids': [1, 2]},
+        )
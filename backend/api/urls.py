@@ -1,6 +1,8 @@
+from django.conf import settings
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
+from .async_views import use_async_views
 from .views import IngredientViewSet, TagViewSet, UsersViewSet, RecipeViewSet
 
 app_name = 'api'
@@ -11,9 +13,12 @@ router_v1.register('users', UsersViewSet, basename='users')
 router_v1.register('ingredients', IngredientViewSet, basename='ingredients')
 router_v1.register('recipes', RecipeViewSet, basename='recipes')
 
+router_urls = router_v1.urls
+if settings.ASYNC_API_VIEWS:
+    use_async_views(router_urls)
 
 urlpatterns = [
-    path('', include(router_v1.urls)),
+    path('', include(router_urls)),
     path('', include('djoser.urls')),
     path('auth/', include('djoser.urls.authtoken')),
 ]
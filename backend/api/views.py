@@ -1,16 +1,36 @@
 from http import HTTPStatus
 
+from django.conf import settings
+from django.db.models import (
+    Count,
+    Exists,
+    Max,
+    OuterRef,
+    Prefetch,
+    Subquery,
+)
 from django.shortcuts import get_object_or_404
 from rest_framework import viewsets, status, filters
 from djoser.views import UserViewSet
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import AllowAny, IsAuthenticated, SAFE_METHODS
 from rest_framework.response import Response
 
-from .services import get_ingredients_for_shopping
+from .autocomplete import ingredient_index
+from .caching import (
+    CatalogCacheMixin,
+    get_cache_version,
+    get_not_modified,
+    make_etag,
+)
+from .exporters import SHOPPING_LIST_EXPORTERS
+from .services import add_batch, get_ingredients_for_shopping, remove_batch
 from users.models import User, Follow
+from foods import feed as feed_service
 from foods.models import (
+    FeedEntry,
     Ingredient,
     Tag,
     Recipe,
@@ -18,6 +38,7 @@ from foods.models import (
     ShoppingCart,
 )
 from .serializers import (
+    BatchIdsSerializer,
     UserListSerializer,
     TagSerializer,
     IngredientSerializer,
@@ -27,8 +48,30 @@ from .serializers import (
     RecipeSubcribeSerializer
 )
 from .filters import IngredientFilter, RecipeFilter
-from .pagination import LimitPageNumberPagination
+from .pagination import (
+    FeedPagination,
+    KeysetPagination,
+    LimitPageNumberPagination,
+)
 from .permissions import AdminOrAuthor, AdminOrReadOnly
+from .signals import get_user_flags_namespace
+
+
+def process_batch(request, model, field, targets):
+    """
+    POST добавляет, DELETE удаляет записи model для списка ids.
+    Повтор запроса безопасен: статус каждого id описывает итог.
+    """
+    serializer = BatchIdsSerializer(data=request.data)
+    serializer.is_valid(raise_exception=True)
+    ids = serializer.validated_data['ids']
+    if request.method == 'POST':
+        statuses = add_batch(request.user, model, field, targets, ids)
+    else:
+        statuses = remove_batch(request.user, model, field, ids)
+    return Response({
+        'results': [{'id': pk, 'status': statuses[pk]} for pk in ids]
+    })
 
 
 class UsersViewSet(UserViewSet):
@@ -37,14 +80,54 @@ class UsersViewSet(UserViewSet):
     search_fields = ('username', 'email')
     permission_classes = (AllowAny,)
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if not user.is_authenticated:
+            return queryset
+        return queryset.annotate(is_subscribed=Exists(
+            Follow.objects.filter(user=user, author=OuterRef('pk'))
+        ))
+
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get(
+            'recipes_limit', settings.SUBSCRIPTION_RECIPES_MAX_LIMIT
+        )
+        try:
+            recipes_limit = int(recipes_limit)
+        except (TypeError, ValueError):
+            raise ValidationError(
+                {'recipes_limit': 'Должно быть целым числом'}
+            )
+        if recipes_limit <= 0:
+            raise ValidationError(
+                {'recipes_limit': 'Должно быть больше 0'}
+            )
+        return min(recipes_limit, settings.SUBSCRIPTION_RECIPES_MAX_LIMIT)
+
+    def get_subscriptions_queryset(self, queryset):
+        """
+        Подписки с первыми recipes_limit рецептами каждого автора:
+        число запросов не зависит от числа подписок.
+        """
+        first_recipes = Recipe.objects.filter(pk__in=Subquery(
+            Recipe.objects.filter(
+                author=OuterRef('author')
+            ).values('pk')[:self.get_recipes_limit()]
+        ))
+        return queryset.select_related('author').prefetch_related(
+            Prefetch('author__recipes', queryset=first_recipes)
+        )
+
     @action(
         methods=['GET'],
         detail=False,
         permission_classes=(IsAuthenticated,)
     )
     def subscriptions(self, request):
-        user = request.user
-        queryset = Follow.objects.filter(user=user)
+        queryset = self.get_subscriptions_queryset(
+            Follow.objects.filter(user=request.user).order_by('-id')
+        )
         page = self.paginate_queryset(queryset)
         serializer = SubscribeSerializer(
             page, many=True, context={'request': request}
@@ -58,8 +141,11 @@ class UsersViewSet(UserViewSet):
     def subscribe(self, request, id):
         author = get_object_or_404(User, id=id)
         if request.method == 'POST':
+            follow = Follow.objects.create(user=request.user, author=author)
             serializer = SubscribeSerializer(
-                Follow.objects.create(user=request.user, author=author),
+                self.get_subscriptions_queryset(
+                    Follow.objects.filter(pk=follow.pk)
+                ).get(),
                 context={'request': request},
             )
             return Response(
@@ -68,15 +154,31 @@ class UsersViewSet(UserViewSet):
         Follow.objects.filter(user=request.user, author=author).delete()
         return Response(status=status.HTTP_204_NO_CONTENT)
 
+    @action(
+        methods=['POST', 'DELETE'],
+        detail=False,
+        url_path='subscribe',
+        url_name='subscribe-batch',
+        permission_classes=(IsAuthenticated,),
+    )
+    def subscribe_batch(self, request):
+        # На себя подписаться нельзя: свой id получает статус not_found.
+        return process_batch(
+            request, Follow, 'author',
+            User.objects.exclude(pk=request.user.pk),
+        )
 
-class TagViewSet(viewsets.ModelViewSet):
+
+class TagViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
+    cache_namespace = 'tags'
     queryset = Tag.objects.all()
     pagination_class = None
     serializer_class = TagSerializer
     permission_classes = (AdminOrReadOnly,)
 
 
-class IngredientViewSet(viewsets.ModelViewSet):
+class IngredientViewSet(CatalogCacheMixin, viewsets.ModelViewSet):
+    cache_namespace = 'ingredients'
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
     pagination_class = None
@@ -84,14 +186,111 @@ class IngredientViewSet(viewsets.ModelViewSet):
     filter_backends = (DjangoFilterBackend, filters.SearchFilter,)
     filterset_class = IngredientFilter
 
+    def get_catalog_data(self, request, *args, **kwargs):
+        name = request.query_params.get('name')
+        if name is None or not settings.INGREDIENT_INDEX_ENABLED:
+            return super().get_catalog_data(request, *args, **kwargs)
+        return ingredient_index.search(name, settings.INGREDIENT_SEARCH_LIMIT)
+
 
 class RecipeViewSet(viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     permission_classes = (AdminOrAuthor,)
     pagination_class = LimitPageNumberPagination
+    keyset_pagination_class = KeysetPagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = RecipeFilter
 
+    @property
+    def paginator(self):
+        """
+        Keyset-пагинация включается параметром ?cursor= и работает только
+        для сортировки по умолчанию, без ordering и search.
+        """
+        if not hasattr(self, '_paginator'):
+            params = self.request.query_params
+            if 'cursor' in params and not (
+                params.keys() & {'ordering', 'search'}
+            ):
+                self._paginator = self.keyset_pagination_class()
+            else:
+                self._paginator = self.pagination_class()
+        return self._paginator
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.request.method in SAFE_METHODS:
+            queryset = queryset.with_related()
+        return queryset.with_user_flags(self.request.user)
+
+    def get_user_flags_version(self):
+        """Версия избранного, корзины и подписок текущего пользователя."""
+        user = self.request.user
+        if not user.is_authenticated:
+            return 'anonymous'
+        namespace = get_user_flags_namespace(user.pk)
+        return f'{user.pk}:{get_cache_version(namespace)}'
+
+    def list(self, request, *args, **kwargs):
+        if isinstance(self.paginator, KeysetPagination):
+            return self.keyset_list(request)
+        state = self.filter_queryset(Recipe.objects.all()).aggregate(
+            updated_at=Max('updated_at'), total=Count('id')
+        )
+        ordering = request.query_params.get('ordering')
+        etag = make_etag(
+            'recipes', state['updated_at'], state['total'],
+            request.META.get('QUERY_STRING', ''),
+            self.get_user_flags_version(),
+            ordering and get_cache_version(f'recipe-ordering:{ordering}'),
+        )
+        response = get_not_modified(request, etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+            response['ETag'] = etag
+        return response
+
+    def keyset_list(self, request):
+        """
+        Страница по ключу определяется самими строками, поэтому ETag
+        строится по ним, без агрегата по всей выборке.
+        """
+        page = self.paginate_queryset(
+            self.filter_queryset(self.get_queryset())
+        )
+        etag = make_etag(
+            'recipes-keyset',
+            [(recipe.pk, recipe.updated_at) for recipe in page],
+            self.paginator.has_next, self.paginator.has_previous,
+            request.META.get('QUERY_STRING', ''),
+            self.get_user_flags_version(),
+        )
+        response = get_not_modified(request, etag)
+        if response is None:
+            serializer = self.get_serializer(page, many=True)
+            response = self.get_paginated_response(serializer.data)
+            response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        try:
+            updated_at = Recipe.objects.filter(
+                pk=kwargs[self.lookup_field]
+            ).values_list('updated_at', flat=True).first()
+        except (TypeError, ValueError):
+            updated_at = None
+        if updated_at is None:
+            return super().retrieve(request, *args, **kwargs)
+        etag = make_etag(
+            'recipe', kwargs[self.lookup_field], updated_at,
+            self.get_user_flags_version(),
+        )
+        response = get_not_modified(request, etag)
+        if response is None:
+            response = super().retrieve(request, *args, **kwargs)
+            response['ETag'] = etag
+        return response
+
     def get_serializer_class(self):
         if self.request.method in SAFE_METHODS:
             return RecipeSerializer
@@ -143,11 +342,60 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return self.__add_recipe(ShoppingCart, request, pk)
         return self.__delete_recipe(ShoppingCart, request, pk)
 
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE'],
+        url_path='favorite',
+        url_name='favorite-batch',
+        permission_classes=(IsAuthenticated,),
+    )
+    def favorite_batch(self, request):
+        return process_batch(request, Favorite, 'recipe', Recipe.objects.all())
+
+    @action(
+        detail=False,
+        methods=['POST', 'DELETE'],
+        url_path='shopping_cart',
+        url_name='shopping-cart-batch',
+        permission_classes=(IsAuthenticated,),
+    )
+    def shopping_cart_batch(self, request):
+        return process_batch(
+            request, ShoppingCart, 'recipe', Recipe.objects.all()
+        )
+
     @action(
         detail=False,
         methods=['GET'],
-        permission_classes=(IsAuthenticated,)
+        permission_classes=(IsAuthenticated,),
+        renderer_classes=SHOPPING_LIST_EXPORTERS,
     )
     def download_shopping_cart(self, request):
-        user = request.user
-        return get_ingredients_for_shopping(user)
+        return get_ingredients_for_shopping(
+            request.user, request.accepted_renderer
+        )
+
+    @action(
+        detail=False,
+        methods=['GET'],
+        permission_classes=(IsAuthenticated,),
+    )
+    def feed(self, request):
+        """Рецепты авторов из подписок, по ключу (pub_date, recipe_id)."""
+        feed_service.refresh(request.user.pk)
+        paginator = FeedPagination()
+        entries = paginator.paginate_queryset(
+            FeedEntry.objects.filter(user=request.user), request, view=self
+        )
+        recipes = self.get_queryset().in_bulk(
+            [entry.recipe_id for entry in entries]
+        )
+        serializer = RecipeSerializer(
+            [
+                recipes[entry.recipe_id] for entry in entries
+                if entry.recipe_id in recipes
+            ],
+            many=True,
+            context=self.get_serializer_context(),
+        )
+        return paginator.get_paginated_response(serializer.data)
@@ -0,0 +1,159 @@
+import asyncio
+import hashlib
+import random
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+PIN_COOKIE = 'pin_primary'
+
+use_primary = ContextVar('use_primary', default=False)
+# Реплика -> время, до которого она считается недоступной.
+unavailable = {}
+
+
+def get_available_replica():
+    replicas = [
+        alias for alias in settings.REPLICA_DATABASES
+        if unavailable.get(alias, 0) <= time.monotonic()
+    ]
+    random.shuffle(replicas)
+    for alias in replicas:
+        try:
+            connections[alias].ensure_connection()
+        except DatabaseError:
+            unavailable[alias] = (
+                time.monotonic() + settings.REPLICA_RETRY_SECONDS
+            )
+            continue
+        return alias
+    return None
+
+
+class ReplicaRouter:
+    """
+    Чтение идёт на случайную доступную реплику из REPLICA_DATABASES,
+    запись и чтение внутри транзакции — на основную базу. Недоступная
+    реплика пропускается REPLICA_RETRY_SECONDS секунд, без реплик
+    чтение возвращается на основную базу.
+    """
+
+    def db_for_read(self, model, **hints):
+        if use_primary.get() or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return get_available_replica() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        return db == DEFAULT_DB_ALIAS
+
+
+def iterate_on_primary(content):
+    """
+    Читает части потокового ответа из основной базы: тело ответа
+    итерируется уже после выхода из middleware.
+    """
+    iterator = iter(content)
+    while True:
+        token = use_primary.set(True)
+        try:
+            chunk = next(iterator, None)
+        finally:
+            use_primary.reset(token)
+        if chunk is None:
+            return
+        yield chunk
+
+
+def get_pin_key(request):
+    authorization = request.META.get('HTTP_AUTHORIZATION')
+    if not authorization:
+        return None
+    digest = hashlib.md5(authorization.encode()).hexdigest()
+    return f'pin-primary:{digest}'
+
+
+class ReplicaPinningMiddleware:
+    """
+    Изменяющие запросы и все запросы клиента в течение
+    REPLICA_PIN_SECONDS после его записи идут в основную базу, чтобы
+    клиент видел свои изменения, пока реплики догоняют. Клиент
+    запоминается по cookie и по заголовку Authorization в кэше.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Так Django 3.2 узнаёт асинхронный middleware.
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def is_pinned(self, request):
+        if request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            return True
+        if request.COOKIES.get(PIN_COOKIE):
+            return True
+        key = get_pin_key(request)
+        return key is not None and cache.get(key) is not None
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        if not settings.REPLICA_DATABASES:
+            return self.get_response(request)
+        pinned = self.is_pinned(request)
+        token = use_primary.set(pinned)
+        try:
+            response = self.get_response(request)
+        finally:
+            use_primary.reset(token)
+        return self.pin(request, self.keep_pinned(response, pinned))
+
+    async def __acall__(self, request):
+        if not settings.REPLICA_DATABASES:
+            return await self.get_response(request)
+        # Кэш может быть сетевым: обращения к нему — вне цикла событий.
+        pinned = await sync_to_async(
+            self.is_pinned, thread_sensitive=False
+        )(request)
+        token = use_primary.set(pinned)
+        try:
+            response = await self.get_response(request)
+        finally:
+            use_primary.reset(token)
+        return await sync_to_async(self.pin, thread_sensitive=False)(
+            request, self.keep_pinned(response, pinned)
+        )
+
+    def keep_pinned(self, response, pinned):
+        if pinned and response.streaming:
+            response.streaming_content = iterate_on_primary(
+                response.streaming_content
+            )
+        return response
+
+    def pin(self, request, response):
+        if (
+            request.method not in ('GET', 'HEAD', 'OPTIONS')
+            and response.status_code < 400
+        ):
+            seconds = settings.REPLICA_PIN_SECONDS
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=seconds, httponly=True,
+                samesite='Lax',
+            )
+            key = get_pin_key(request)
+            if key is not None:
+                cache.set(key, True, seconds)
+        return response
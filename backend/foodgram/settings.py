@@ -33,6 +33,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.profiling.QueryBudgetMiddleware',
+    'foodgram.db_router.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -61,6 +63,13 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'foodgram.wsgi.application'
+ASGI_APPLICATION = 'foodgram.asgi.application'
+
+# Асинхронные варианты чтения рецептов, ингредиентов и списка покупок.
+# Включаются только при запуске под ASGI-сервером.
+ASYNC_API_VIEWS = os.getenv('ASYNC_API_VIEWS', default='false').lower() in (
+    'true', '1',
+)
 
 
 DATABASES = {
@@ -74,6 +83,41 @@ DATABASES = {
     }
 }
 
+# Реплики для чтения: хосты через запятую, остальные параметры
+# подключения совпадают с основной базой.
+REPLICA_DATABASES = []
+for index, host in enumerate(
+    host for host in os.getenv('DB_REPLICA_HOSTS', default='').split(',')
+    if host.strip()
+):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host.strip(),
+        'TEST': {'MIRROR': 'default'},
+    }
+    REPLICA_DATABASES.append(alias)
+
+DATABASE_ROUTERS = ['foodgram.db_router.ReplicaRouter']
+REPLICA_PIN_SECONDS = 10
+REPLICA_RETRY_SECONDS = 30
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='foodgram'),
+    }
+}
+# Версии кэша, по которым отдаются ответы 304, должны быть общими для
+# всех процессов: с локальным кэшем процесс не видит чужих сбросов.
+CACHE_SHARED = CACHES['default']['BACKEND'] not in (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -108,8 +152,17 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
     ),
+    'DEFAULT_RENDERER_CLASSES': [
+        'api.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
         'rest_framework.filters.SearchFilter',
@@ -135,7 +188,68 @@ DJOSER = {
     },
 }
 
-SHOPPING_CART_FILENAME = 'shopping_list.txt'
+CATALOG_CACHE_TIMEOUT = 60 * 10
+
+AUTH_TOKEN_CACHE_TIMEOUT = 60
+
+INGREDIENT_INDEX_ENABLED = True
+INGREDIENT_INDEX_TTL = 300
+INGREDIENT_SEARCH_LIMIT = 50
+
+SUBSCRIPTION_RECIPES_MAX_LIMIT = 50
+
+BATCH_MAX_IDS = 100
+
+RECIPE_IMAGE_MAX_SIZE = 5 * 1024 * 1024
+RECIPE_IMAGE_MAX_PIXELS = 40_000_000
+RECIPE_IMAGE_WIDTHS = {'preview': 160, 'list': 480, 'detail': 960}
+RECIPE_IMAGE_QUALITY = 85
+RECIPE_IMAGE_ASYNC = True
+RECIPE_IMAGE_WORKERS = 2
+
+SEARCH_CONFIG = 'russian'
+
+TRENDING_HALF_LIFE_HOURS = 72
+TRENDING_FAVORITE_WEIGHT = 1.0
+TRENDING_CART_WEIGHT = 0.5
+TRENDING_MIN_SCORE = 0.01
+
+QUERY_PROFILING_SAMPLE_RATE = float(
+    os.getenv('QUERY_PROFILING_SAMPLE_RATE', default=0)
+)
+QUERY_BUDGET_ENFORCE = False
+QUERY_BUDGETS = {
+    'users-list': 4,
+    'users-me': 3,
+    'users-subscriptions': 6,
+    'tags-list': 2,
+    'ingredients-list': 2,
+    'recipes-list': 8,
+    'recipes-detail': 6,
+}
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'api.profiling': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
+FEED_MAX_ENTRIES = 500
+FEED_FANOUT_MAX_FOLLOWERS = 5000
+FEED_REFRESH_INTERVAL = 60
+
+SHOPPING_CART_FILENAME = 'shopping_list'
+SHOPPING_CART_CHUNK_SIZE = 2000
+SHOPPING_CART_PDF_SPOOL_SIZE = 1024 * 1024
+SHOPPING_CART_PDF_FONT = os.getenv(
+    'SHOPPING_CART_PDF_FONT',
+    default='/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf',
+)
 
 STATIC_URL = '/static/'
 STATIC_ROOT = os.path.join(BASE_DIR, 'static')
@@ -4,6 +4,7 @@ from .models import (
     AmountIngredient,
     Favorite,
     Ingredient,
+    MeasurementUnit,
     Recipe,
     ShoppingCart,
     Tag
@@ -19,7 +20,8 @@ class RecipeIngredientsAdmin(admin.ModelAdmin):
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
     list_display = (
-        'id', 'name', 'text', 'cooking_time', 'pub_date', 'get_favorite_count'
+        'id', 'name', 'text', 'cooking_time', 'pub_date',
+        'get_favorite_count', 'in_carts_count',
     )
     search_fields = (
         'name', 'cooking_time',
@@ -29,7 +31,7 @@ class RecipeAdmin(admin.ModelAdmin):
 
     @admin.display(description='В избранном')
     def get_favorite_count(self, obj):
-        return obj.favorite.count()
+        return obj.favorites_count
 
 
 @admin.register(Favorite)
@@ -43,6 +45,12 @@ class IngredientAdmin(admin.ModelAdmin):
     search_fields = ('name',)
 
 
+@admin.register(MeasurementUnit)
+class MeasurementUnitAdmin(admin.ModelAdmin):
+    list_display = ('id', 'name', 'base_unit', 'factor', 'is_numeric',)
+    search_fields = ('name',)
+
+
 @admin.register(Tag)
 class TagAdmin(admin.ModelAdmin):
     list_display = ('id', 'name', 'color', 'slug',)
@@ -0,0 +1,137 @@
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import transaction
+from django.db.models import F, Sum
+from django.db.models.functions import Greatest
+
+from users.models import User
+from .models import AmountIngredient, ShoppingCart, ShoppingCartItemTotal
+
+# Рецепты, итоги которых сигналы не трогают: удаляемые (итоги вычтены
+# в pre_delete) и изменяемые через API (разницу переносит сериализатор).
+skipped_recipes = ContextVar('skipped_recipes', default=frozenset())
+
+
+def is_skipped(recipe_id):
+    return recipe_id in skipped_recipes.get()
+
+
+@contextmanager
+def skip_recipe(recipe_id):
+    token = skipped_recipes.set(skipped_recipes.get() | {recipe_id})
+    try:
+        yield
+    finally:
+        skipped_recipes.reset(token)
+
+
+def get_amounts(recipe_id):
+    return dict(AmountIngredient.objects.filter(
+        recipe_id=recipe_id
+    ).values_list('ingredients_id', 'amount'))
+
+
+@transaction.atomic
+def apply(user_ids, deltas):
+    """
+    Прибавляет deltas ({id ингредиента: изменение}) к итогам
+    пользователей. Число запросов не зависит от размера корзины.
+    """
+    user_ids = list(user_ids)
+    deltas = {pk: delta for pk, delta in deltas.items() if delta}
+    if not user_ids or not deltas:
+        return
+    # Как в add_batch: изменения итогов одного пользователя идут по
+    # очереди, иначе две корзины с общим новым ингредиентом вставят
+    # одну и ту же строку. Порядок по pk защищает от взаимоблокировок.
+    list(User.objects.select_for_update().filter(
+        pk__in=user_ids
+    ).order_by('pk').values_list('pk', flat=True))
+    rows = list(ShoppingCartItemTotal.objects.select_for_update().filter(
+        user_id__in=user_ids, ingredient_id__in=deltas
+    ))
+    for row in rows:
+        row.amount = Greatest(F('amount') + deltas[row.ingredient_id], 0)
+    ShoppingCartItemTotal.objects.bulk_update(
+        rows, ('amount',), batch_size=1000
+    )
+    existing = {(row.user_id, row.ingredient_id) for row in rows}
+    ShoppingCartItemTotal.objects.bulk_create(
+        (
+            ShoppingCartItemTotal(
+                user_id=user_id, ingredient_id=pk, amount=delta
+            )
+            for user_id in user_ids
+            for pk, delta in deltas.items()
+            if delta > 0 and (user_id, pk) not in existing
+        ),
+        batch_size=1000,
+    )
+    if any(delta < 0 for delta in deltas.values()):
+        ShoppingCartItemTotal.objects.filter(
+            user_id__in=user_ids, ingredient_id__in=deltas, amount__lte=0
+        ).delete()
+
+
+def add_recipe(user_id, recipe_id, sign=1):
+    apply([user_id], {
+        pk: sign * amount for pk, amount in get_amounts(recipe_id).items()
+    })
+
+
+def add_recipes(user_id, recipe_ids, sign=1):
+    rows = AmountIngredient.objects.filter(
+        recipe_id__in=recipe_ids
+    ).values('ingredients_id').annotate(total=Sum('amount')).order_by()
+    apply([user_id], {
+        row['ingredients_id']: sign * row['total'] for row in rows
+    })
+
+
+def change_recipe(recipe_id, deltas):
+    """Переносит изменение состава рецепта на корзины, где он лежит."""
+    if any(deltas.values()):
+        apply(
+            ShoppingCart.objects.filter(
+                recipe_id=recipe_id
+            ).values_list('user_id', flat=True),
+            deltas,
+        )
+
+
+def get_actual_totals(user_ids=None):
+    """Итоги, посчитанные с нуля по корзинам и составу рецептов."""
+    if user_ids is None:
+        lookup = {'recipe__shopping_cart__isnull': False}
+    else:
+        lookup = {'recipe__shopping_cart__user_id__in': user_ids}
+    amounts = AmountIngredient.objects.filter(**lookup)
+    rows = amounts.values(
+        'recipe__shopping_cart__user_id', 'ingredients_id'
+    ).annotate(total=Sum('amount')).order_by()
+    return Counter({
+        (row['recipe__shopping_cart__user_id'], row['ingredients_id']):
+            row['total']
+        for row in rows
+    })
+
+
+@transaction.atomic
+def rebuild(user_ids=None):
+    totals = ShoppingCartItemTotal.objects.all()
+    if user_ids is not None:
+        totals = totals.filter(user_id__in=user_ids)
+    totals.delete()
+    ShoppingCartItemTotal.objects.bulk_create(
+        (
+            ShoppingCartItemTotal(
+                user_id=user_id, ingredient_id=ingredient_id, amount=total
+            )
+            for (user_id, ingredient_id), total in get_actual_totals(
+                user_ids
+            ).items()
+        ),
+        batch_size=1000,
+    )
@@ -0,0 +1,51 @@
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from users.models import Follow, User
+from .models import Favorite, Recipe, ShoppingCart
+
+# Модель-источник: (модель со счётчиком, поле связи, поле счётчика).
+COUNTERS = {
+    Favorite: (Recipe, 'recipe_id', 'favorites_count'),
+    ShoppingCart: (Recipe, 'recipe_id', 'in_carts_count'),
+    Follow: (User, 'author_id', 'followers_count'),
+    Recipe: (User, 'author_id', 'recipes_count'),
+}
+
+
+def change_counter(source, instance, delta):
+    model, field, counter = COUNTERS[source]
+    queryset = model.objects.filter(pk=getattr(instance, field))
+    if delta < 0:
+        queryset = queryset.filter(**{f'{counter}__gte': -delta})
+    queryset.update(**{counter: F(counter) + delta})
+
+
+def change_counters(source, target_ids, delta):
+    """Как change_counter, но сразу для нескольких объектов."""
+    model, _, counter = COUNTERS[source]
+    queryset = model.objects.filter(pk__in=target_ids)
+    if delta < 0:
+        queryset = queryset.filter(**{f'{counter}__gte': -delta})
+    queryset.update(**{counter: F(counter) + delta})
+
+
+def get_actual_count(source, field):
+    return Coalesce(Subquery(
+        source.objects.filter(
+            **{field: OuterRef('pk')}
+        ).order_by().values(field).annotate(
+            total=Count('pk')
+        ).values('total')
+    ), 0)
+
+
+def recount(source):
+    """Исправляет разошедшиеся счётчики, возвращает число исправленных."""
+    model, field, counter = COUNTERS[source]
+    drifted = model.objects.annotate(
+        actual=get_actual_count(source, field)
+    ).exclude(**{counter: F('actual')})
+    return model.objects.filter(pk__in=drifted.values('pk')).update(
+        **{counter: get_actual_count(source, field)}
+    )
@@ -0,0 +1,138 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.db.models import Q
+
+from users.models import Follow
+from .models import FeedEntry, Recipe
+
+ORDERING = ('-pub_date', '-id')
+
+# Удаляет из лент подписчиков автора записи старше FEED_MAX_ENTRIES
+# последних, в том же порядке, что и trim().
+TRIM_FOLLOWERS_SQL = (
+    'DELETE FROM foods_feedentry WHERE id IN ('
+    'SELECT id FROM ('
+    'SELECT e.id, ROW_NUMBER() OVER ('
+    'PARTITION BY e.user_id ORDER BY e.pub_date DESC, e.recipe_id DESC'
+    ') AS position '
+    'FROM foods_feedentry e '
+    'JOIN users_follow f ON f.user_id = e.user_id '
+    'WHERE f.author_id = %s'
+    ') ranked WHERE position > %s)'
+)
+
+
+def make_entries(user_ids, recipes):
+    return [
+        FeedEntry(
+            user_id=user_id,
+            recipe_id=recipe['id'],
+            author_id=recipe['author_id'],
+            pub_date=recipe['pub_date'],
+        )
+        for user_id in user_ids
+        for recipe in recipes
+    ]
+
+
+def get_latest(recipes):
+    return list(recipes.order_by(*ORDERING).values(
+        'id', 'author_id', 'pub_date'
+    )[:settings.FEED_MAX_ENTRIES])
+
+
+def push_recipe(recipe):
+    """
+    Рассылает новый рецепт в ленты подписчиков и обрезает их. Рецепты
+    авторов с числом подписчиков больше FEED_FANOUT_MAX_FOLLOWERS
+    не рассылаются: подписчики забирают их сами при чтении ленты.
+    """
+    # Подписчики читаются из базы: followers_count у объекта автора
+    # (например, пользователя из кэша токенов) может быть устаревшим.
+    follower_ids = list(Follow.objects.filter(
+        author_id=recipe.author_id
+    ).values_list('user_id', flat=True)[
+        :settings.FEED_FANOUT_MAX_FOLLOWERS + 1
+    ])
+    if (
+        not follower_ids
+        or len(follower_ids) > settings.FEED_FANOUT_MAX_FOLLOWERS
+    ):
+        return
+    FeedEntry.objects.bulk_create(
+        make_entries(follower_ids, [{
+            'id': recipe.pk,
+            'author_id': recipe.author_id,
+            'pub_date': recipe.pub_date,
+        }]),
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            TRIM_FOLLOWERS_SQL,
+            [recipe.author_id, settings.FEED_MAX_ENTRIES],
+        )
+
+
+def trim(user_id):
+    """Оставляет в ленте не больше FEED_MAX_ENTRIES новых записей."""
+    boundary = FeedEntry.objects.filter(user_id=user_id).order_by(
+        '-pub_date', '-recipe_id'
+    ).values('pub_date', 'recipe_id')[
+        settings.FEED_MAX_ENTRIES:settings.FEED_MAX_ENTRIES + 1
+    ]
+    if not boundary:
+        return
+    boundary = boundary[0]
+    FeedEntry.objects.filter(
+        Q(pub_date__lt=boundary['pub_date'])
+        | Q(pub_date=boundary['pub_date'],
+            recipe_id__lte=boundary['recipe_id']),
+        user_id=user_id,
+    ).delete()
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту последние рецепты автора после подписки."""
+    FeedEntry.objects.bulk_create(
+        make_entries(
+            [user_id], get_latest(Recipe.objects.filter(author_id=author_id))
+        ),
+        ignore_conflicts=True,
+    )
+    trim(user_id)
+
+
+def pull(user_id):
+    """Забирает в ленту рецепты авторов, которым рассылка не делается."""
+    authors = Follow.objects.filter(
+        user_id=user_id,
+        author__followers_count__gt=settings.FEED_FANOUT_MAX_FOLLOWERS,
+    ).values('author_id')
+    recipes = get_latest(Recipe.objects.filter(author_id__in=authors))
+    if recipes:
+        FeedEntry.objects.bulk_create(
+            make_entries([user_id], recipes), ignore_conflicts=True,
+        )
+
+
+def refresh(user_id):
+    """
+    Подтягивает рецепты популярных авторов и обрезает ленту
+    не чаще раза в FEED_REFRESH_INTERVAL секунд.
+    """
+    if cache.add(f'feed-refresh:{user_id}', True,
+                 settings.FEED_REFRESH_INTERVAL):
+        pull(user_id)
+        trim(user_id)
+
+
+@transaction.atomic
+def rebuild(user_id):
+    """Собирает ленту заново из рецептов всех авторов подписок."""
+    FeedEntry.objects.filter(user_id=user_id).delete()
+    FeedEntry.objects.bulk_create(make_entries([user_id], get_latest(
+        Recipe.objects.filter(author__following__user_id=user_id)
+    )))
@@ -0,0 +1,97 @@
+import hashlib
+import io
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+VARIANT_FORMATS = {'webp': 'WEBP', 'jpg': 'JPEG'}
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.RECIPE_IMAGE_WORKERS,
+    thread_name_prefix='recipe-image',
+)
+
+
+def get_variant_name(image_hash, width, extension='webp'):
+    return f'recipes/{image_hash}_{width}.{extension}'
+
+
+def save_variant(image, name, image_format):
+    if default_storage.exists(name):
+        return
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, quality=settings.RECIPE_IMAGE_QUALITY)
+    default_storage.save(name, ContentFile(buffer.getvalue()))
+
+
+def process_recipe_image(recipe_id):
+    """
+    Перекодирует картинку рецепта в WebP и JPEG нужных ширин без EXIF.
+    Имена файлов строятся из хэша содержимого, поэтому одинаковые
+    картинки не обрабатываются дважды. Оригинал заменяется полноразмерной
+    копией без EXIF.
+    """
+    # Задача идёт в потоке пула без закрепления за основной базой:
+    # отстающая реплика может ещё не знать о только что созданном рецепте.
+    recipe = Recipe.objects.using(DEFAULT_DB_ALIAS).filter(
+        pk=recipe_id
+    ).first()
+    if recipe is None or not recipe.image:
+        return
+    original = recipe.image.name
+    with recipe.image.open('rb') as file:
+        content = file.read()
+    image_hash = hashlib.sha256(content).hexdigest()[:32]
+    with Image.open(io.BytesIO(content)) as image:
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        for extension, image_format in VARIANT_FORMATS.items():
+            save_variant(
+                image,
+                get_variant_name(image_hash, 'full', extension),
+                image_format,
+            )
+        for width in sorted(set(settings.RECIPE_IMAGE_WIDTHS.values())):
+            variant = image.copy()
+            variant.thumbnail((width, variant.height))
+            for extension, image_format in VARIANT_FORMATS.items():
+                save_variant(
+                    variant,
+                    get_variant_name(image_hash, width, extension),
+                    image_format,
+                )
+    updated = Recipe.objects.filter(pk=recipe_id, image=original).update(
+        image=get_variant_name(image_hash, 'full', 'jpg'),
+        image_hash=image_hash,
+        updated_at=timezone.now(),
+    )
+    if updated and not original.startswith('recipes/'):
+        default_storage.delete(original)
+
+
+def run_image_processing(recipe_id):
+    try:
+        process_recipe_image(recipe_id)
+    except Exception:
+        logger.exception('Ошибка обработки картинки рецепта %s', recipe_id)
+    finally:
+        connections.close_all()
+
+
+def schedule_image_processing(recipe):
+    """Обработка запускается в пуле потоков после коммита транзакции."""
+    if not settings.RECIPE_IMAGE_ASYNC:
+        transaction.on_commit(lambda: process_recipe_image(recipe.pk))
+        return
+    transaction.on_commit(
+        lambda: executor.submit(run_image_processing, recipe.pk)
+    )
@@ -0,0 +1,51 @@
+from collections import Counter
+
+from django.core.management import BaseCommand
+
+from foods import cart_totals
+from foods.models import ShoppingCartItemTotal
+
+
+class Command(BaseCommand):
+    help = 'Compares maintained shopping cart totals with a full recount'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--fix',
+            action='store_true',
+            help='Пересобрать итоги пользователей с расхождениями',
+        )
+
+    def handle(self, *args, **options):
+        actual = cart_totals.get_actual_totals()
+        stored = Counter({
+            (user_id, ingredient_id): amount
+            for user_id, ingredient_id, amount in
+            ShoppingCartItemTotal.objects.values_list(
+                'user_id', 'ingredient_id', 'amount'
+            ).iterator()
+        })
+        drifted = {
+            key for key in actual.keys() | stored.keys()
+            if actual[key] != stored[key]
+        }
+        for user_id, ingredient_id in sorted(drifted):
+            key = (user_id, ingredient_id)
+            self.stdout.write(
+                f'Пользователь {user_id}, ингредиент {ingredient_id}: '
+                f'хранится {stored[key]}, должно быть {actual[key]}'
+            )
+        if not drifted:
+            self.stdout.write(self.style.SUCCESS('Расхождений нет'))
+            return
+        users = {user_id for user_id, _ in drifted}
+        if options['fix']:
+            cart_totals.rebuild(users)
+            self.stdout.write(self.style.SUCCESS(
+                f'Итоги пересобраны для пользователей: {len(users)}'
+            ))
+        else:
+            self.stdout.write(self.style.WARNING(
+                f'Расхождений: {len(drifted)}, пользователей: {len(users)}. '
+                'Запустите с --fix, чтобы исправить'
+            ))
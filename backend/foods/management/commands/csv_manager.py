@@ -1,23 +1,107 @@
 import csv
+import json
+import time
+from itertools import islice
 
 from django.conf import settings
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
 
 from foods.models import Ingredient
+from foods.signals import ingredients_loaded
+from foods.units import link_units
 
 
 class Command(BaseCommand):
+    help = 'Loads ingredients from csv or json'
 
-    def handle(self, *args, **options):
-        with open(
-            f'{settings.BASE_DIR}/data/ingredients.csv',
-            'r',
-            encoding='utf-8',
-        ) as file:
-            file_reader = csv.reader(file)
-            for row in file_reader:
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=f'{settings.BASE_DIR}/data/ingredients.csv',
+            help='Файл .csv или .json с ингредиентами',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Сколько строк вставлять одним запросом',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Посчитать новые ингредиенты, ничего не записывая',
+        )
+
+    @staticmethod
+    def read_csv(file):
+        for row in csv.reader(file):
+            if row:
                 name, measurement_unit = row
-                Ingredient.objects.get_or_create(
-                    name=name,
-                    measurement_unit=measurement_unit)
+                yield name.strip(), measurement_unit.strip()
+
+    @staticmethod
+    def read_json(file):
+        for item in json.load(file):
+            yield item['name'].strip(), item['measurement_unit'].strip()
+
+    @staticmethod
+    @transaction.atomic
+    def load(rows, batch_size, dry_run):
+        existing = set(
+            Ingredient.objects.values_list('name', 'measurement_unit')
+        )
+        total = created = 0
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                if not dry_run:
+                    link_units(Ingredient.objects.filter(unit__isnull=True))
+                if created and not dry_run:
+                    # Индекс автодополнения и кэш справочника сбрасываются
+                    # после коммита, чтобы не перестроиться по старым данным.
+                    transaction.on_commit(
+                        lambda: ingredients_loaded.send(sender=Ingredient)
+                    )
+                return total, created
+            total += len(batch)
+            new = []
+            for pair in batch:
+                if pair not in existing:
+                    existing.add(pair)
+                    new.append(Ingredient(
+                        name=pair[0], measurement_unit=pair[1]
+                    ))
+            created += len(new)
+            if new and not dry_run:
+                Ingredient.objects.bulk_create(new, ignore_conflicts=True)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        batch_size = options['batch_size']
+        if batch_size <= 0:
+            raise CommandError('--batch-size должен быть больше 0')
+        if path.endswith('.json'):
+            reader = self.read_json
+        elif path.endswith('.csv'):
+            reader = self.read_csv
+        else:
+            raise CommandError('Поддерживаются только файлы .csv и .json')
+
+        started = time.monotonic()
+        with open(path, 'r', encoding='utf-8') as file:
+            total, created = self.load(
+                reader(file), batch_size, options['dry_run']
+            )
+        elapsed = time.monotonic() - started
+
+        self.stdout.write(
+            f'Прочитано строк: {total}, новых: {created}, '
+            f'пропущено: {total - created}, '
+            f'время: {elapsed:.2f} с '
+            f'({total / elapsed if elapsed else total:.0f} строк/с)'
+        )
+        if options['dry_run']:
+            self.stdout.write(self.style.WARNING('Пробный запуск, без записи'))
+            return
         self.stdout.write(self.style.SUCCESS('Все ингридиенты загружены!'))
@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+
+from foods.images import process_recipe_image
+from foods.models import Recipe
+
+
+class Command(BaseCommand):
+    help = 'Builds image variants for recipes that do not have them yet'
+
+    def handle(self, *args, **options):
+        recipe_ids = Recipe.objects.filter(
+            image_hash=''
+        ).exclude(image='').values_list('id', flat=True)
+        for recipe_id in recipe_ids.iterator():
+            process_recipe_image(recipe_id)
+        self.stdout.write(self.style.SUCCESS('Картинки обработаны'))
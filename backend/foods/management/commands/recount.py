@@ -0,0 +1,17 @@
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from foods.counters import COUNTERS, recount
+
+
+class Command(BaseCommand):
+    help = 'Recounts favorites, carts, followers and recipes counters'
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        for source, (model, _, counter) in COUNTERS.items():
+            fixed = recount(source)
+            self.stdout.write(
+                f'{model.__name__}.{counter}: исправлено {fixed}'
+            )
+        self.stdout.write(self.style.SUCCESS('Счётчики пересчитаны'))
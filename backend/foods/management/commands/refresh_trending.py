@@ -0,0 +1,61 @@
+import math
+from collections import Counter
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, Max
+from django.utils import timezone
+
+from foods.models import Favorite, Recipe, ShoppingCart, TrendingCheckpoint
+
+
+class Command(BaseCommand):
+    help = 'Refreshes time-decayed recipe scores for trending ordering'
+
+    @staticmethod
+    def collect(model, last_id, weight, scores):
+        """Добавляет в scores новые записи с id больше last_id."""
+        rows = model.objects.filter(id__gt=last_id).values(
+            'recipe_id'
+        ).annotate(total=Count('id'), last=Max('id')).order_by()
+        for row in rows:
+            scores[row['recipe_id']] += row['total'] * weight
+            last_id = max(last_id, row['last'])
+        return last_id
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        now = timezone.now()
+        checkpoint, _ = TrendingCheckpoint.objects.select_for_update(
+        ).get_or_create(pk=1)
+        if checkpoint.refreshed_at:
+            hours = (now - checkpoint.refreshed_at).total_seconds() / 3600
+            factor = 0.5 ** (hours / settings.TRENDING_HALF_LIFE_HOURS)
+            if not math.isclose(factor, 1):
+                rated = Recipe.objects.filter(trending_score__gt=0)
+                rated.update(trending_score=F('trending_score') * factor)
+                rated.filter(
+                    trending_score__lt=settings.TRENDING_MIN_SCORE
+                ).update(trending_score=0)
+
+        scores = Counter()
+        checkpoint.last_favorite_id = self.collect(
+            Favorite, checkpoint.last_favorite_id,
+            settings.TRENDING_FAVORITE_WEIGHT, scores,
+        )
+        checkpoint.last_cart_id = self.collect(
+            ShoppingCart, checkpoint.last_cart_id,
+            settings.TRENDING_CART_WEIGHT, scores,
+        )
+        recipes = Recipe.objects.only('trending_score').in_bulk(scores)
+        for recipe_id, recipe in recipes.items():
+            recipe.trending_score += scores[recipe_id]
+        Recipe.objects.bulk_update(
+            recipes.values(), ('trending_score',), batch_size=1000
+        )
+        checkpoint.refreshed_at = now
+        checkpoint.save()
+        self.stdout.write(self.style.SUCCESS(
+            f'Рейтинг обновлён: {len(recipes)} рецептов'
+        ))
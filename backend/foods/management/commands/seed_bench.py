@@ -0,0 +1,185 @@
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+
+from foods import cart_totals, feed
+from foods.counters import COUNTERS, recount
+from foods.models import (
+    AmountIngredient,
+    Favorite,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    Tag,
+)
+from foods.search import update_search_index
+from foods.units import link_units
+from users.models import Follow, User
+
+PREFIX = 'bench_'
+UNITS = ('г', 'кг', 'мл', 'л', 'шт.', 'ст. л.', 'ч. л.', 'по вкусу')
+
+
+class Command(BaseCommand):
+    help = 'Generates synthetic users, recipes, follows, favorites and carts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--recipes', type=int, default=2000)
+        parser.add_argument('--ingredients', type=int, default=500)
+        parser.add_argument(
+            '--ingredients-per-recipe', type=int, default=8,
+        )
+        parser.add_argument('--follows', type=int, default=20,
+                            help='Подписок на пользователя')
+        parser.add_argument('--favorites', type=int, default=30,
+                            help='Избранных рецептов на пользователя')
+        parser.add_argument('--cart', type=int, default=10,
+                            help='Рецептов в корзине на пользователя')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--clear',
+            action='store_true',
+            help='Удалить данные предыдущего запуска',
+        )
+
+    def bulk(self, model, objects):
+        model.objects.bulk_create(
+            objects, batch_size=self.batch_size, ignore_conflicts=True,
+        )
+
+    def create_tags(self):
+        tags = [
+            Tag(name=f'{PREFIX}tag_{i}', color=f'#{i:06X}',
+                slug=f'{PREFIX}tag_{i}')
+            for i in range(10)
+        ]
+        self.bulk(Tag, tags)
+        return list(Tag.objects.values_list('id', flat=True))
+
+    def create_ingredients(self, count):
+        self.bulk(Ingredient, (
+            Ingredient(
+                name=f'{PREFIX}ингредиент {i}',
+                measurement_unit=self.random.choice(UNITS),
+            )
+            for i in range(count)
+        ))
+        # Как в csv_manager: bulk_create не вызывает pre_save с единицами.
+        link_units(Ingredient.objects.filter(name__startswith=PREFIX))
+        return list(Ingredient.objects.values_list('id', flat=True))
+
+    def create_users(self, count):
+        password = make_password(PREFIX)
+        self.bulk(User, (
+            User(
+                username=f'{PREFIX}user_{i}',
+                email=f'{PREFIX}user_{i}@example.com',
+                first_name=f'Имя {i}',
+                last_name=f'Фамилия {i}',
+                password=password,
+            )
+            for i in range(count)
+        ))
+        return list(User.objects.filter(
+            username__startswith=PREFIX
+        ).order_by('id').values_list('id', flat=True))
+
+    def create_recipes(self, count, user_ids, tag_ids, ingredient_ids,
+                       per_recipe):
+        words = ('суп', 'салат', 'пирог', 'рагу', 'каша', 'омлет', 'паста')
+        self.bulk(Recipe, (
+            Recipe(
+                author_id=self.random.choice(user_ids),
+                name=f'{self.random.choice(words).capitalize()} {i}',
+                text=' '.join(self.random.choices(words, k=30)),
+                cooking_time=self.random.randint(1, 240),
+                image='recipes/bench.jpg',
+            )
+            for i in range(count)
+        ))
+        recipe_ids = list(Recipe.objects.filter(
+            author_id__in=user_ids
+        ).order_by('id').values_list('id', flat=True))
+        self.bulk(Recipe.tags.through, (
+            Recipe.tags.through(recipe_id=recipe_id, tag_id=tag_id)
+            for recipe_id in recipe_ids
+            for tag_id in self.random.sample(
+                tag_ids, min(len(tag_ids), self.random.randint(1, 3))
+            )
+        ))
+        per_recipe = min(per_recipe, len(ingredient_ids))
+        self.bulk(AmountIngredient, (
+            AmountIngredient(
+                recipe_id=recipe_id,
+                ingredients_id=ingredient_id,
+                amount=self.random.randint(1, 1000),
+            )
+            for recipe_id in recipe_ids
+            for ingredient_id in self.random.sample(
+                ingredient_ids, per_recipe
+            )
+        ))
+        return recipe_ids
+
+    def create_links(self, model, field, user_ids, target_ids, per_user):
+        for user_id in user_ids:
+            targets = [
+                target for target in self.random.sample(
+                    target_ids, min(per_user + 1, len(target_ids))
+                )
+                if not (model is Follow and target == user_id)
+            ][:per_user]
+            self.bulk(model, (
+                model(user_id=user_id, **{field: target})
+                for target in targets
+            ))
+
+    @transaction.atomic
+    def seed(self, options):
+        tag_ids = self.create_tags()
+        ingredient_ids = self.create_ingredients(options['ingredients'])
+        user_ids = self.create_users(options['users'])
+        recipe_ids = self.create_recipes(
+            options['recipes'], user_ids, tag_ids, ingredient_ids,
+            options['ingredients_per_recipe'],
+        )
+        self.create_links(
+            Follow, 'author_id', user_ids, user_ids, options['follows'],
+        )
+        self.create_links(
+            Favorite, 'recipe_id', user_ids, recipe_ids, options['favorites'],
+        )
+        self.create_links(
+            ShoppingCart, 'recipe_id', user_ids, recipe_ids, options['cart'],
+        )
+        # bulk_create не отправляет сигналы: счётчики, поисковый индекс,
+        # итоги корзин и ленты подписок приводятся в порядок отдельно.
+        for source in COUNTERS:
+            recount(source)
+        update_search_index()
+        cart_totals.rebuild()
+        for user_id in user_ids:
+            feed.rebuild(user_id)
+        return len(user_ids), len(recipe_ids)
+
+    def handle(self, *args, **options):
+        if options['batch_size'] <= 0:
+            raise CommandError('--batch-size должен быть больше 0')
+        self.batch_size = options['batch_size']
+        self.random = random.Random(options['seed'])
+        if options['clear']:
+            User.objects.filter(username__startswith=PREFIX).delete()
+            Ingredient.objects.filter(name__startswith=PREFIX).delete()
+            Tag.objects.filter(slug__startswith=PREFIX).delete()
+
+        started = time.monotonic()
+        users, recipes = self.seed(options)
+        self.stdout.write(self.style.SUCCESS(
+            f'Создано пользователей: {users}, рецептов: {recipes} '
+            f'за {time.monotonic() - started:.1f} с'
+        ))
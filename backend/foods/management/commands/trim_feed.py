@@ -0,0 +1,38 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db.models import Count
+
+from foods import feed
+from foods.models import FeedEntry
+from users.models import Follow
+
+
+class Command(BaseCommand):
+    help = 'Trims subscription feeds down to FEED_MAX_ENTRIES entries'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rebuild',
+            action='store_true',
+            help='Собрать ленты всех подписчиков заново',
+        )
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            user_ids = Follow.objects.values_list(
+                'user_id', flat=True
+            ).distinct()
+            for user_id in user_ids:
+                feed.rebuild(user_id)
+            self.stdout.write(self.style.SUCCESS('Ленты собраны заново'))
+            return
+        user_ids = list(FeedEntry.objects.values('user_id').annotate(
+            total=Count('id')
+        ).filter(total__gt=settings.FEED_MAX_ENTRIES).values_list(
+            'user_id', flat=True
+        ))
+        for user_id in user_ids:
+            feed.trim(user_id)
+        self.stdout.write(self.style.SUCCESS(
+            f'Обрезано лент: {len(user_ids)}'
+        ))
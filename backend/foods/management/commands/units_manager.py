@@ -0,0 +1,49 @@
+import csv
+
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.db import transaction
+
+from foods.models import Ingredient, MeasurementUnit
+from foods.units import link_units
+
+
+class Command(BaseCommand):
+    help = 'Loads measurement units and links ingredients to them'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path',
+            default=f'{settings.BASE_DIR}/data/units.csv',
+            help='Файл .csv: единица, каноническая единица, множитель, '
+                 'суммируется ли количество (1/0)',
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        with open(options['path'], 'r', encoding='utf-8') as file:
+            units = [
+                MeasurementUnit(
+                    name=name.strip(),
+                    base_unit=base_unit.strip(),
+                    factor=int(factor),
+                    is_numeric=is_numeric.strip() == '1',
+                )
+                for name, base_unit, factor, is_numeric in csv.reader(file)
+            ]
+        existing = MeasurementUnit.objects.in_bulk(field_name='name')
+        fields = ('base_unit', 'factor', 'is_numeric')
+        changed = []
+        for unit in units:
+            if unit.name in existing:
+                unit.pk = existing[unit.name].pk
+                changed.append(unit)
+        MeasurementUnit.objects.bulk_update(changed, fields)
+        MeasurementUnit.objects.bulk_create(
+            unit for unit in units if unit.name not in existing
+        )
+        link_units()
+        linked = Ingredient.objects.filter(unit__isnull=False).count()
+        self.stdout.write(self.style.SUCCESS(
+            f'Единиц загружено: {len(units)}, ингредиентов связано: {linked}'
+        ))
@@ -0,0 +1,41 @@
+# Generated by Django 3.2.15 on 2026-10-18 16:38
+
+from django.db import migrations, models
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    Ingredient = apps.get_model('foods', 'Ingredient')
+    AmountIngredient = apps.get_model('foods', 'AmountIngredient')
+    duplicates = Ingredient.objects.values(
+        'name', 'measurement_unit'
+    ).annotate(
+        first_id=models.Min('id'), total=models.Count('id')
+    ).filter(total__gt=1)
+    for group in duplicates:
+        extra_ids = list(Ingredient.objects.filter(
+            name=group['name'], measurement_unit=group['measurement_unit'],
+        ).exclude(id=group['first_id']).values_list('id', flat=True))
+        for extra_id in extra_ids:
+            AmountIngredient.objects.filter(
+                ingredients_id=extra_id,
+            ).exclude(
+                recipe__amount_ingredient__ingredients_id=group['first_id'],
+            ).update(ingredients_id=group['first_id'])
+        Ingredient.objects.filter(id__in=extra_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0003_alter_recipe_tags'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop,
+        ),
+        migrations.AddConstraint(
+            model_name='ingredient',
+            constraint=models.UniqueConstraint(fields=('name', 'measurement_unit'), name='unique_ingredient_name_unit'),
+        ),
+    ]
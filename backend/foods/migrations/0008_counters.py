@@ -0,0 +1,48 @@
+# Generated by Django 3.2.15 on 2026-10-18 16:45
+
+from django.db import migrations, models
+from django.db.models.functions import Coalesce
+
+
+def fill_counters(apps, schema_editor):
+    Recipe = apps.get_model('foods', 'Recipe')
+    Favorite = apps.get_model('foods', 'Favorite')
+    ShoppingCart = apps.get_model('foods', 'ShoppingCart')
+    User = apps.get_model('users', 'User')
+    Follow = apps.get_model('users', 'Follow')
+    counters = (
+        (Favorite, Recipe, 'recipe_id', 'favorites_count'),
+        (ShoppingCart, Recipe, 'recipe_id', 'in_carts_count'),
+        (Follow, User, 'author_id', 'followers_count'),
+        (Recipe, User, 'author_id', 'recipes_count'),
+    )
+    for source, model, field, counter in counters:
+        model.objects.update(**{counter: Coalesce(models.Subquery(
+            source.objects.filter(
+                **{field: models.OuterRef('pk')}
+            ).order_by().values(field).annotate(
+                total=models.Count('pk')
+            ).values('total')
+        ), 0)})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0007_recipe_image_hash'),
+        ('users', '0003_counters'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='favorites_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В избранном'),
+        ),
+        migrations.AddField(
+            model_name='recipe',
+            name='in_carts_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='В списках покупок'),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,74 @@
+# Generated by Django 3.2.15 on 2026-10-18 16:48
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+# SQL скопирован из foods.search на момент миграции: историческая
+# миграция не должна меняться вместе с кодом приложения.
+INGREDIENT_NAMES_SQL = (
+    'SELECT {aggregate} FROM foods_amountingredient a '
+    'JOIN foods_ingredient i ON i.id = a.ingredients_id '
+    'WHERE a.recipe_id = r.id'
+)
+
+CREATE_SQL = {
+    'postgresql': (
+        'CREATE INDEX IF NOT EXISTS foods_recipe_search_idx '
+        'ON foods_recipe USING gin (search_vector)'
+    ),
+    'sqlite': (
+        'CREATE VIRTUAL TABLE IF NOT EXISTS foods_recipe_fts '
+        'USING fts5(name, text, ingredients)'
+    ),
+}
+
+FILL_SQL = {
+    'postgresql': (
+        'UPDATE foods_recipe r SET search_vector = '
+        "setweight(to_tsvector('russian', r.name), 'A') || "
+        "setweight(to_tsvector('russian', r.text), 'B') || "
+        "setweight(to_tsvector('russian', coalesce(("
+        + INGREDIENT_NAMES_SQL.format(aggregate="string_agg(i.name, ' ')")
+        + "), '')), 'C')"
+    ),
+    'sqlite': (
+        'INSERT INTO foods_recipe_fts (rowid, name, text, ingredients) '
+        'SELECT r.id, r.name, r.text, ('
+        + INGREDIENT_NAMES_SQL.format(aggregate="group_concat(i.name, ' ')")
+        + ') FROM foods_recipe r'
+    ),
+}
+
+DROP_SQL = {
+    'postgresql': 'DROP INDEX IF EXISTS foods_recipe_search_idx',
+    'sqlite': 'DROP TABLE IF EXISTS foods_recipe_fts',
+}
+
+
+def build_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor in CREATE_SQL:
+        schema_editor.execute(CREATE_SQL[vendor])
+        schema_editor.execute(FILL_SQL[vendor])
+
+
+def remove_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor in DROP_SQL:
+        schema_editor.execute(DROP_SQL[vendor])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0009_trending'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый индекс'),
+        ),
+        migrations.RunPython(build_search_index, remove_search_index),
+    ]
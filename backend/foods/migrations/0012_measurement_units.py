@@ -0,0 +1,34 @@
+# Generated by Django 3.2.15 on 2026-10-18 16:59
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0011_feed'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MeasurementUnit',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=20, unique=True, verbose_name='Единица измерения')),
+                ('base_unit', models.CharField(max_length=20, verbose_name='Каноническая единица')),
+                ('factor', models.PositiveIntegerField(default=1, verbose_name='Множитель к канонической единице')),
+                ('is_numeric', models.BooleanField(default=True, verbose_name='Количество суммируется')),
+            ],
+            options={
+                'verbose_name': 'Единица измерения',
+                'verbose_name_plural': 'Единицы измерения',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.AddField(
+            model_name='ingredient',
+            name='unit',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='ingredients', to='foods.measurementunit', verbose_name='Нормализованная единица'),
+        ),
+    ]
@@ -0,0 +1,55 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:01
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def fill_cart_totals(apps, schema_editor):
+    AmountIngredient = apps.get_model('foods', 'AmountIngredient')
+    ShoppingCartItemTotal = apps.get_model('foods', 'ShoppingCartItemTotal')
+    rows = AmountIngredient.objects.filter(
+        recipe__shopping_cart__isnull=False
+    ).values(
+        'recipe__shopping_cart__user_id', 'ingredients_id'
+    ).annotate(total=models.Sum('amount')).order_by()
+    ShoppingCartItemTotal.objects.bulk_create(
+        (
+            ShoppingCartItemTotal(
+                user_id=row['recipe__shopping_cart__user_id'],
+                ingredient_id=row['ingredients_id'],
+                amount=row['total'],
+            )
+            for row in rows.iterator()
+        ),
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('foods', '0012_measurement_units'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShoppingCartItemTotal',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('amount', models.PositiveIntegerField(verbose_name='Количество')),
+                ('ingredient', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='foods.ingredient', verbose_name='Ингредиент')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cart_totals', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь')),
+            ],
+            options={
+                'verbose_name': 'Итог списка покупок',
+                'verbose_name_plural': 'Итоги списков покупок',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='shoppingcartitemtotal',
+            constraint=models.UniqueConstraint(fields=('user', 'ingredient'), name='unique_cart_item_total'),
+        ),
+        migrations.RunPython(fill_cart_totals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.15 on 2026-10-18 17:45
+
+from django.db import migrations, models
+
+
+def copy_scores(apps, schema_editor):
+    Recipe = apps.get_model('foods', 'Recipe')
+    RecipeScore = apps.get_model('foods', 'RecipeScore')
+    Recipe.objects.filter(
+        pk__in=RecipeScore.objects.values('recipe_id')
+    ).update(trending_score=models.Subquery(
+        RecipeScore.objects.filter(
+            recipe_id=models.OuterRef('pk')
+        ).values('score')[:1]
+    ))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('foods', '0013_cart_totals'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='trending_score',
+            field=models.FloatField(default=0, editable=False, verbose_name='Рейтинг'),
+        ),
+        migrations.RunPython(copy_scores, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='recipe',
+            index=models.Index(fields=['-trending_score', '-pub_date', '-id'], name='recipe_trending_idx'),
+        ),
+        migrations.DeleteModel(
+            name='RecipeScore',
+        ),
+    ]
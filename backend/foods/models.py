@@ -1,6 +1,7 @@
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 
-from users.models import User
+from users.models import Follow, User
 
 
 class Tag(models.Model):
@@ -28,6 +29,39 @@ class Tag(models.Model):
         return self.name
 
 
+class MeasurementUnit(models.Model):
+    """
+    Единица измерения и её перевод в каноническую: кг и г суммируются
+    в граммах, л и мл — в миллилитрах. Единицы вроде «по вкусу»
+    не суммируются.
+    """
+    name = models.CharField(
+        verbose_name='Единица измерения',
+        max_length=20,
+        unique=True,
+    )
+    base_unit = models.CharField(
+        verbose_name='Каноническая единица',
+        max_length=20,
+    )
+    factor = models.PositiveIntegerField(
+        verbose_name='Множитель к канонической единице',
+        default=1,
+    )
+    is_numeric = models.BooleanField(
+        verbose_name='Количество суммируется',
+        default=True,
+    )
+
+    class Meta:
+        ordering = ('name',)
+        verbose_name = 'Единица измерения'
+        verbose_name_plural = 'Единицы измерения'
+
+    def __str__(self):
+        return self.name
+
+
 class Ingredient(models.Model):
     name = models.CharField(
         verbose_name='Название ингредиента',
@@ -37,16 +71,68 @@ class Ingredient(models.Model):
         verbose_name='Единица измерения',
         max_length=20,
     )
+    unit = models.ForeignKey(
+        MeasurementUnit,
+        verbose_name='Нормализованная единица',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+        related_name='ingredients',
+    )
 
     class Meta:
         ordering = ('name',)
         verbose_name = 'Ингредиент'
         verbose_name_plural = 'Ингредиенты'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('name', 'measurement_unit'),
+                name='unique_ingredient_name_unit',
+            ),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class RecipeQuerySet(models.QuerySet):
+    """
+    Выборки рецептов для API без запросов на каждую строку.
+    """
+
+    def with_related(self):
+        return self.select_related('author').prefetch_related(
+            'tags',
+            models.Prefetch(
+                'amount_ingredient',
+                queryset=AmountIngredient.objects.select_related(
+                    'ingredients'
+                ),
+            ),
+        )
+
+    def with_user_flags(self, user):
+        if not user.is_authenticated:
+            false = models.Value(False, output_field=models.BooleanField())
+            return self.annotate(
+                is_favorited=false,
+                is_in_shopping_cart=false,
+                author_is_subscribed=false,
+            )
+        return self.annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                user=user, recipe=models.OuterRef('pk')
+            )),
+            is_in_shopping_cart=models.Exists(ShoppingCart.objects.filter(
+                user=user, recipe=models.OuterRef('pk')
+            )),
+            author_is_subscribed=models.Exists(Follow.objects.filter(
+                user=user, author=models.OuterRef('author')
+            )),
+        )
+
+
 class Recipe(models.Model):
     tags = models.ManyToManyField(
         Tag,
@@ -69,6 +155,10 @@ class Recipe(models.Model):
         verbose_name='Дата публикации рецепта',
         auto_now_add=True
     )
+    updated_at = models.DateTimeField(
+        verbose_name='Дата изменения рецепта',
+        auto_now=True
+    )
     name = models.CharField(
         verbose_name='Название',
         max_length=200
@@ -77,6 +167,12 @@ class Recipe(models.Model):
         verbose_name='Картинка',
         upload_to='media'
     )
+    image_hash = models.CharField(
+        verbose_name='Хэш обработанной картинки',
+        max_length=32,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(
         verbose_name='Описание',
         max_length=500
@@ -84,11 +180,53 @@ class Recipe(models.Model):
     cooking_time = models.PositiveIntegerField(
         verbose_name='Время приготовления в минутах'
     )
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='В избранном',
+        default=0,
+        editable=False,
+    )
+    in_carts_count = models.PositiveIntegerField(
+        verbose_name='В списках покупок',
+        default=0,
+        editable=False,
+    )
+    # Затухающий со временем рейтинг для сортировки trending,
+    # пересчитывается командой refresh_trending.
+    trending_score = models.FloatField(
+        verbose_name='Рейтинг',
+        default=0,
+        editable=False,
+    )
+    search_vector = SearchVectorField(
+        verbose_name='Поисковый индекс',
+        null=True,
+        editable=False,
+    )
+
+    objects = RecipeQuerySet.as_manager()
 
     class Meta:
-        ordering = ('-pub_date',)
+        ordering = ('-pub_date', '-id')
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
+        indexes = [
+            models.Index(
+                fields=('-pub_date', '-id'),
+                name='recipe_pub_date_id_idx',
+            ),
+            models.Index(
+                fields=('-favorites_count', '-pub_date', '-id'),
+                name='recipe_popular_idx',
+            ),
+            models.Index(
+                fields=('-trending_score', '-pub_date', '-id'),
+                name='recipe_trending_idx',
+            ),
+            models.Index(
+                fields=('cooking_time', '-pub_date', '-id'),
+                name='recipe_cooking_time_idx',
+            ),
+        ]
 
     def __str__(self):
         return self.name
@@ -181,3 +319,103 @@ class ShoppingCart(models.Model):
 
     def __str__(self):
         return f'Список покупок пользователя {self.user}.'
+
+
+class TrendingCheckpoint(models.Model):
+    """
+    До каких записей избранного и корзины уже учтён рейтинг.
+    """
+    last_favorite_id = models.BigIntegerField(default=0)
+    last_cart_id = models.BigIntegerField(default=0)
+    refreshed_at = models.DateTimeField(null=True)
+
+    class Meta:
+        verbose_name = 'Отметка пересчёта рейтинга'
+        verbose_name_plural = 'Отметки пересчёта рейтинга'
+
+    def __str__(self):
+        return f'Рейтинг пересчитан {self.refreshed_at}'
+
+
+class FeedEntry(models.Model):
+    """
+    Запись ленты подписок: рецепт автора, на которого подписан
+    пользователь. Рассылается при публикации, хранится не больше
+    FEED_MAX_ENTRIES записей на пользователя.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='feed',
+        verbose_name='Пользователь',
+    )
+    recipe = models.ForeignKey(
+        Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries',
+        verbose_name='Рецепт',
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Автор',
+    )
+    pub_date = models.DateTimeField(
+        verbose_name='Дата публикации рецепта',
+    )
+
+    class Meta:
+        verbose_name = 'Запись ленты'
+        verbose_name_plural = 'Лента подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'recipe'),
+                name='unique_feed_entry',
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=('user', '-pub_date', '-recipe'),
+                name='feed_user_pub_date_idx',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.recipe} в ленте {self.user}'
+
+
+class ShoppingCartItemTotal(models.Model):
+    """
+    Сколько ингредиента нужно пользователю по всем рецептам корзины.
+    Меняется вместе с корзиной и составом рецептов, сверяется командой
+    check_cart_totals.
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='cart_totals',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        on_delete=models.CASCADE,
+        related_name='+',
+        verbose_name='Ингредиент',
+    )
+    amount = models.PositiveIntegerField(
+        verbose_name='Количество',
+    )
+
+    class Meta:
+        verbose_name = 'Итог списка покупок'
+        verbose_name_plural = 'Итоги списков покупок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_cart_item_total',
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.ingredient}: {self.amount}'
@@ -0,0 +1,116 @@
+import re
+
+from django.conf import settings
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.db import connections
+from django.db.models import F
+from django.db.models.expressions import RawSQL
+
+# Полнотекстовый индекс рецептов: в Postgres это колонка search_vector
+# с GIN-индексом, в SQLite — FTS5-таблица foods_recipe_fts.
+
+INGREDIENT_NAMES_SQL = (
+    'SELECT {aggregate} FROM foods_amountingredient a '
+    'JOIN foods_ingredient i ON i.id = a.ingredients_id '
+    'WHERE a.recipe_id = r.id'
+)
+
+POSTGRES_UPDATE_SQL = (
+    'UPDATE foods_recipe r SET search_vector = '
+    "setweight(to_tsvector(%(config)s, r.name), 'A') || "
+    "setweight(to_tsvector(%(config)s, r.text), 'B') || "
+    'setweight(to_tsvector(%(config)s, coalesce(('
+    + INGREDIENT_NAMES_SQL.format(aggregate="string_agg(i.name, ' ')")
+    + "), '')), 'C')"
+)
+
+SQLITE_INSERT_SQL = (
+    'INSERT INTO foods_recipe_fts (rowid, name, text, ingredients) '
+    'SELECT r.id, r.name, r.text, ('
+    + INGREDIENT_NAMES_SQL.format(aggregate="group_concat(i.name, ' ')")
+    + ') FROM foods_recipe r'
+)
+
+
+def create_search_index(connection):
+    if connection.vendor == 'postgresql':
+        sql = (
+            'CREATE INDEX IF NOT EXISTS foods_recipe_search_idx '
+            'ON foods_recipe USING gin (search_vector)'
+        )
+    elif connection.vendor == 'sqlite':
+        sql = (
+            'CREATE VIRTUAL TABLE IF NOT EXISTS foods_recipe_fts '
+            'USING fts5(name, text, ingredients)'
+        )
+    else:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+
+
+def drop_search_index(connection):
+    if connection.vendor == 'postgresql':
+        sql = 'DROP INDEX IF EXISTS foods_recipe_search_idx'
+    elif connection.vendor == 'sqlite':
+        sql = 'DROP TABLE IF EXISTS foods_recipe_fts'
+    else:
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+
+
+def update_search_index(recipe_ids=None, using='default'):
+    """Пересобирает индекс для переданных рецептов или для всех."""
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        if connection.vendor == 'postgresql':
+            sql = POSTGRES_UPDATE_SQL
+            params = {'config': settings.SEARCH_CONFIG}
+            if recipe_ids is not None:
+                sql += ' WHERE r.id = ANY(%(ids)s)'
+                params['ids'] = list(recipe_ids)
+            cursor.execute(sql, params)
+        elif connection.vendor == 'sqlite':
+            if recipe_ids is None:
+                cursor.execute('DELETE FROM foods_recipe_fts')
+                cursor.execute(SQLITE_INSERT_SQL)
+                return
+            recipe_ids = list(recipe_ids)
+            placeholders = ', '.join(['%s'] * len(recipe_ids))
+            cursor.execute(
+                'DELETE FROM foods_recipe_fts '
+                f'WHERE rowid IN ({placeholders})',
+                recipe_ids,
+            )
+            cursor.execute(
+                f'{SQLITE_INSERT_SQL} WHERE r.id IN ({placeholders})',
+                recipe_ids,
+            )
+
+
+def search_recipes(queryset, query):
+    """
+    Оставляет рецепты, подходящие под запрос, и сортирует по релевантности.
+    """
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        search_query = SearchQuery(
+            query, config=settings.SEARCH_CONFIG, search_type='websearch'
+        )
+        return queryset.filter(search_vector=search_query).annotate(
+            rank=SearchRank(F('search_vector'), search_query)
+        ).order_by('-rank', '-pub_date', '-id')
+    words = re.findall(r'\w+', query)
+    if vendor != 'sqlite' or not words:
+        return queryset.filter(name__icontains=query)
+    match = ' '.join(f'"{word}"*' for word in words)
+    return queryset.filter(id__in=RawSQL(
+        'SELECT rowid FROM foods_recipe_fts WHERE foods_recipe_fts MATCH %s',
+        (match,),
+    )).annotate(rank=RawSQL(
+        'SELECT -bm25(foods_recipe_fts) FROM foods_recipe_fts '
+        'WHERE foods_recipe_fts MATCH %s '
+        'AND foods_recipe_fts.rowid = foods_recipe.id',
+        (match,),
+    )).order_by('-rank', '-pub_date', '-id')
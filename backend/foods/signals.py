@@ -0,0 +1,204 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models.signals import (
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import Signal, receiver
+from django.utils import timezone
+
+from users.models import Follow
+from . import cart_totals, feed
+from .counters import change_counter, change_counters
+from .models import (
+    AmountIngredient,
+    Favorite,
+    FeedEntry,
+    Ingredient,
+    MeasurementUnit,
+    Recipe,
+    ShoppingCart,
+)
+from .search import update_search_index
+from .units import link_units
+
+# Отправляется после bulk_create избранного, корзины или подписок,
+# который не вызывает post_save: sender — модель, user_id — владелец
+# записей, target_ids — id рецептов или авторов.
+bulk_created = Signal()
+# Отправляется после массовой загрузки ингредиентов (csv_manager),
+# которая тоже не вызывает post_save.
+ingredients_loaded = Signal()
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_save, sender=ShoppingCart)
+@receiver(post_save, sender=Follow)
+@receiver(post_save, sender=Recipe)
+def increment_counter(sender, instance, created, **kwargs):
+    if created:
+        change_counter(sender, instance, 1)
+
+
+@receiver(post_delete, sender=Favorite)
+@receiver(post_delete, sender=ShoppingCart)
+@receiver(post_delete, sender=Follow)
+@receiver(post_delete, sender=Recipe)
+def decrement_counter(sender, instance, **kwargs):
+    change_counter(sender, instance, -1)
+
+
+def schedule_search_update(recipe_ids):
+    """
+    Индекс обновляется после коммита, когда ингредиенты рецепта уже
+    записаны.
+    """
+    transaction.on_commit(lambda: update_search_index(recipe_ids))
+
+
+@receiver(post_save, sender=Recipe)
+@receiver(post_delete, sender=Recipe)
+def update_recipe_search(instance, **kwargs):
+    schedule_search_update([instance.pk])
+
+
+# Удаление ингредиента каскадом удаляет его строки состава, и этот же
+# приёмник убирает ингредиент из индекса рецептов.
+@receiver(post_save, sender=AmountIngredient)
+@receiver(post_delete, sender=AmountIngredient)
+def update_amount_ingredient_search(instance, **kwargs):
+    schedule_search_update([instance.recipe_id])
+
+
+@receiver(post_save, sender=Ingredient)
+def update_ingredient_search(instance, created, **kwargs):
+    if not created:
+        schedule_search_update(list(Recipe.objects.filter(
+            amount_ingredient__ingredients=instance
+        ).values_list('id', flat=True)))
+
+
+@receiver(post_save, sender=Recipe)
+def push_recipe_to_feed(instance, created, **kwargs):
+    if created:
+        transaction.on_commit(lambda: feed.push_recipe(instance))
+
+
+@receiver(post_save, sender=Follow)
+def backfill_feed(instance, created, **kwargs):
+    if created:
+        transaction.on_commit(
+            lambda: feed.backfill(instance.user_id, instance.author_id)
+        )
+
+
+@receiver(post_delete, sender=Follow)
+def clean_feed(instance, **kwargs):
+    FeedEntry.objects.filter(
+        user_id=instance.user_id, author_id=instance.author_id
+    ).delete()
+
+
+@receiver(pre_save, sender=Ingredient)
+def link_ingredient_unit(instance, **kwargs):
+    instance.unit = MeasurementUnit.objects.filter(
+        name=instance.measurement_unit
+    ).first()
+
+
+@receiver(post_save, sender=MeasurementUnit)
+@receiver(post_delete, sender=MeasurementUnit)
+def relink_unit_ingredients(instance, **kwargs):
+    link_units(Ingredient.objects.filter(measurement_unit=instance.name))
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_cart_totals(instance, created, **kwargs):
+    if created:
+        cart_totals.add_recipe(instance.user_id, instance.recipe_id)
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def subtract_cart_totals(instance, **kwargs):
+    if not cart_totals.is_skipped(instance.recipe_id):
+        cart_totals.add_recipe(instance.user_id, instance.recipe_id, -1)
+
+
+@receiver(pre_delete, sender=Recipe)
+def subtract_deleted_recipe_totals(instance, **kwargs):
+    """
+    Состав рецепта удаляется каскадом раньше записей корзины, поэтому
+    итоги вычитаются до удаления, а сигналы корзины их пропускают.
+    """
+    cart_totals.change_recipe(instance.pk, {
+        pk: -amount
+        for pk, amount in cart_totals.get_amounts(instance.pk).items()
+    })
+    cart_totals.skipped_recipes.set(
+        cart_totals.skipped_recipes.get() | {instance.pk}
+    )
+
+
+@receiver(post_delete, sender=Recipe)
+def forget_deleted_recipe(instance, **kwargs):
+    cart_totals.skipped_recipes.set(
+        cart_totals.skipped_recipes.get() - {instance.pk}
+    )
+
+
+def change_recipe_amounts(changes):
+    """
+    Переносит изменения состава ({id рецепта: {id ингредиента: delta}})
+    на итоги корзин и обновляет updated_at рецептов.
+    """
+    recipe_ids = [
+        recipe_id for recipe_id, deltas in changes.items()
+        if any(deltas.values()) and not cart_totals.is_skipped(recipe_id)
+    ]
+    for recipe_id in recipe_ids:
+        cart_totals.change_recipe(recipe_id, changes[recipe_id])
+    if recipe_ids:
+        Recipe.objects.filter(pk__in=recipe_ids).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(pre_save, sender=AmountIngredient)
+def remember_stored_amount(instance, **kwargs):
+    instance._stored_amount = None if instance.pk is None else (
+        AmountIngredient.objects.filter(pk=instance.pk).values(
+            'recipe_id', 'ingredients_id', 'amount'
+        ).first()
+    )
+
+
+@receiver(post_save, sender=AmountIngredient)
+def change_saved_amount_totals(instance, **kwargs):
+    """Правка состава не через API, например в админке."""
+    changes = defaultdict(Counter)
+    stored = getattr(instance, '_stored_amount', None)
+    if stored is not None:
+        changes[stored['recipe_id']][stored['ingredients_id']] -= (
+            stored['amount']
+        )
+    changes[instance.recipe_id][instance.ingredients_id] += instance.amount
+    change_recipe_amounts(changes)
+
+
+@receiver(post_delete, sender=AmountIngredient)
+def change_deleted_amount_totals(instance, **kwargs):
+    change_recipe_amounts({
+        instance.recipe_id: {instance.ingredients_id: -instance.amount}
+    })
+
+
+@receiver(bulk_created)
+def handle_bulk_created(sender, user_id, target_ids, **kwargs):
+    change_counters(sender, target_ids, 1)
+    if sender is ShoppingCart:
+        cart_totals.add_recipes(user_id, target_ids)
+    elif sender is Follow:
+        transaction.on_commit(lambda: feed.rebuild(user_id))
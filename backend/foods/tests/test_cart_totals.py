@@ -0,0 +1,91 @@
+from collections import Counter
+
+from api.tests.fixtures import RecipeAPITestCase, create_user
+from foods.cart_totals import get_actual_totals
+from foods.models import (
+    AmountIngredient,
+    Ingredient,
+    Recipe,
+    ShoppingCart,
+    ShoppingCartItemTotal,
+)
+
+
+class CartTotalsTest(RecipeAPITestCase):
+    """Итоги корзин совпадают с пересчётом при любой правке состава."""
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = create_user('other-reader')
+        for user in (cls.user, cls.other):
+            ShoppingCart.objects.create(user=user, recipe=cls.recipes[0])
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipes[4])
+
+    def assert_totals(self):
+        stored = Counter({
+            (row.user_id, row.ingredient_id): row.amount
+            for row in ShoppingCartItemTotal.objects.all()
+        })
+        self.assertEqual(stored, get_actual_totals())
+
+    def get_updated_at(self, recipe):
+        return Recipe.objects.values_list(
+            'updated_at', flat=True
+        ).get(pk=recipe.pk)
+
+    def test_admin_edits(self):
+        recipe = self.recipes[0]
+        updated_at = self.get_updated_at(recipe)
+        item = recipe.amount_ingredient.first()
+        item.amount += 7
+        item.save()
+        self.assert_totals()
+        self.assertGreater(self.get_updated_at(recipe), updated_at)
+
+        item.ingredients = self.ingredients[5]
+        item.save()
+        self.assert_totals()
+
+        item.recipe = self.recipes[4]
+        item.save()
+        self.assert_totals()
+
+        AmountIngredient.objects.create(
+            recipe=recipe, ingredients=self.ingredients[4], amount=3
+        )
+        self.assert_totals()
+
+        recipe.amount_ingredient.first().delete()
+        self.assert_totals()
+
+    def test_ingredient_delete(self):
+        Ingredient.objects.filter(pk=self.ingredients[0].pk).delete()
+        self.assert_totals()
+
+    def test_recipe_delete(self):
+        self.recipes[0].delete()
+        self.assert_totals()
+
+    def test_api_update(self):
+        """Путь API меняет итоги один раз, без повтора в сигналах."""
+        recipe = self.recipes[0]
+        self.client.force_authenticate(recipe.author)
+        response = self.client.patch(
+            f'/api/recipes/{recipe.pk}/',
+            {'ingredients': [
+                {'id': self.ingredients[0].pk, 'amount': 1},
+                {'id': self.ingredients[1].pk, 'amount': 50},
+            ]},
+            format='json',
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assert_totals()
+
+    def test_cart_changes(self):
+        ShoppingCart.objects.filter(
+            user=self.user, recipe=self.recipes[4]
+        ).delete()
+        self.assert_totals()
+        ShoppingCart.objects.create(user=self.other, recipe=self.recipes[8])
+        self.assert_totals()
@@ -0,0 +1,49 @@
+from django.test import TestCase, override_settings
+
+from api.tests.fixtures import create_recipe, create_user
+from foods import feed
+from foods.models import FeedEntry
+from users.models import Follow
+
+
+@override_settings(FEED_MAX_ENTRIES=2, FEED_FANOUT_MAX_FOLLOWERS=2)
+class FeedFanoutTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = create_user('author')
+        cls.followers = [
+            create_user(f'follower-{index}') for index in range(2)
+        ]
+        Follow.objects.bulk_create(
+            Follow(user=user, author=cls.author) for user in cls.followers
+        )
+
+    def get_feed(self, user):
+        return list(FeedEntry.objects.filter(user=user).order_by(
+            '-pub_date', '-recipe_id'
+        ).values_list('recipe_id', flat=True))
+
+    def test_push_trims_timelines(self):
+        recipes = []
+        for index in range(3):
+            with self.captureOnCommitCallbacks(execute=True):
+                recipes.append(create_recipe(self.author, f'Рецепт {index}'))
+        for user in self.followers:
+            self.assertEqual(
+                self.get_feed(user), [recipes[2].pk, recipes[1].pk]
+            )
+
+    def test_push_ignores_stale_followers_count(self):
+        recipe = create_recipe(self.author, 'Рецепт')
+        FeedEntry.objects.all().delete()
+        recipe.author.followers_count = 10 ** 6
+        feed.push_recipe(recipe)
+        for user in self.followers:
+            self.assertEqual(self.get_feed(user), [recipe.pk])
+
+    def test_popular_author_is_not_pushed(self):
+        Follow.objects.create(user=create_user('reader'), author=self.author)
+        recipe = create_recipe(self.author, 'Рецепт')
+        feed.push_recipe(recipe)
+        self.assertFalse(FeedEntry.objects.exists())
@@ -0,0 +1,41 @@
+from django.test import TestCase
+
+from api.tests.fixtures import create_recipe, create_user
+from foods.models import AmountIngredient, Ingredient, Recipe
+from foods.search import search_recipes
+
+
+class SearchIndexTest(TestCase):
+    """Индекс следует за составом рецепта и названиями ингредиентов."""
+
+    def setUp(self):
+        self.ingredient = Ingredient.objects.create(
+            name='Шафран', measurement_unit='г'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe = create_recipe(create_user('author'), 'Плов')
+            self.amount = AmountIngredient.objects.create(
+                recipe=self.recipe, ingredients=self.ingredient, amount=1
+            )
+
+    def assert_found(self, query, found=True):
+        recipes = search_recipes(Recipe.objects.all(), query)
+        self.assertEqual(list(recipes), [self.recipe] if found else [])
+
+    def test_amount_delete(self):
+        self.assert_found('шафран')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.amount.delete()
+        self.assert_found('шафран', found=False)
+        self.assert_found('плов')
+
+    def test_ingredient_rename_and_delete(self):
+        self.ingredient.name = 'Кардамон'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredient.save()
+        self.assert_found('шафран', found=False)
+        self.assert_found('кардамон')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredient.delete()
+        self.assert_found('кардамон', found=False)
+        self.assert_found('плов')
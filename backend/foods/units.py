@@ -0,0 +1,14 @@
+from django.db.models import OuterRef, Subquery
+
+from .models import Ingredient, MeasurementUnit
+
+
+def link_units(queryset=None):
+    """Проставляет ингредиентам единицу из таблицы единиц одним UPDATE."""
+    if queryset is None:
+        queryset = Ingredient.objects.all()
+    return queryset.update(unit=Subquery(
+        MeasurementUnit.objects.filter(
+            name=OuterRef('measurement_unit')
+        ).values('id')[:1]
+    ))
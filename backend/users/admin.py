@@ -5,7 +5,10 @@ from .models import User, Follow
 
 @admin.register(User)
 class UserAdmin(admin.ModelAdmin):
-    list_display = ('username', 'email', 'first_name', 'last_name',)
+    list_display = (
+        'username', 'email', 'first_name', 'last_name',
+        'recipes_count', 'followers_count',
+    )
     search_fields = ('username', 'email',)
     list_filter = ('email', 'first_name',)
 